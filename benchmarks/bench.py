@@ -0,0 +1,217 @@
+"""
+Benchmark suite of shellui update, build, draw, keyboard navigation and tag search.
+
+Runs headless with MemoryBackend and saves results in JSON format:
+
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --sizes 100,10000 --compare results.json
+"""
+import argparse
+import curses
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from shellui import __version__
+from shellui.core import MemoryBackend
+from shellui.ui import Root, VLayout, HLayout, Label, Button, CheckBox
+
+WIDGETS = (Label, Button, CheckBox)
+SHAPES = ("flat", "grid", "deep")
+FORMAT_VERSION = 1
+MEMORY_TREE_SIZE = 10000
+
+
+def create_widget(index: int):
+    widget_class = WIDGETS[index % len(WIDGETS)]
+    return widget_class(text=f"{widget_class.__name__} {index}", tag=f"tag{index % 10}")
+
+
+def build_tree(size: int, shape: str):
+    """
+    Builds layout tree with given count of widgets
+
+    :param size: Count of widgets
+    :param shape: "flat" - one VLayout, "grid" - VLayout of HLayout rows with 10 widgets,
+                  "deep" - alternating VLayout and HLayout nested with 10 children per layout
+    :return: Top layout and count of created elements
+    """
+    widgets = [create_widget(index) for index in range(size)]
+    if shape == "flat":
+        layout = VLayout()
+        layout.add_elements(*widgets)
+        return layout, size + 1
+    if shape == "grid":
+        layout = VLayout()
+        rows = []
+        for start in range(0, size, 10):
+            row = HLayout()
+            row.add_elements(*widgets[start:start + 10])
+            rows.append(row)
+        layout.add_elements(*rows)
+        return layout, size + len(rows) + 1
+    if shape == "deep":
+        level, count, vertical = widgets, size, False
+        while len(level) > 1:
+            next_level = []
+            for start in range(0, len(level), 10):
+                layout = VLayout() if vertical else HLayout()
+                layout.add_elements(*level[start:start + 10])
+                next_level.append(layout)
+            count += len(next_level)
+            level, vertical = next_level, not vertical
+        layout = VLayout()
+        layout.add_elements(*level)
+        return layout, count + 1
+    raise ValueError(f"Unknown shape '{shape}'")
+
+
+def measure(function, min_time: float, max_iterations: int, setup=None) -> dict:
+    """
+    Calls function until min_time passes or max_iterations is reached
+
+    :return: Timing result with ops/sec and mean time in milliseconds
+    """
+    iterations, elapsed = 0, 0.0
+    while elapsed < min_time and iterations < max_iterations:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        elapsed += time.perf_counter() - start
+        iterations += 1
+    return {"iterations": iterations,
+            "ops_per_sec": iterations / elapsed if elapsed else float("inf"),
+            "mean_ms": elapsed / iterations * 1000}
+
+
+def bench_tree(size: int, shape: str, min_time: float, max_iterations: int) -> list:
+    # tracing slows allocations down, so memory is measured on separate tree of limited size
+    gc.collect()
+    tracemalloc.start()
+    _, traced_count = build_tree(min(size, MEMORY_TREE_SIZE), shape)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bytes_per_element = memory / traced_count
+
+    gc.collect()
+    start = time.perf_counter()
+    layout, element_count = build_tree(size, shape)
+    build_time = time.perf_counter() - start
+
+    backend = MemoryBackend(120, 50)
+    root = Root(backend=backend)
+    root.set_layout(layout)
+    widgets = layout.search_elements_by_class(Label)
+    changed = widgets[len(widgets) // 2]
+
+    def full_update():
+        root.update()
+
+    def invalidate_all():
+        for element in layout.get_subtree():
+            element.invalidate()
+
+    def single_change():
+        changed.set_text(changed.text)
+        root.update()
+
+    def build():
+        # widgets are rendered lazily while draw plan is compiled, so plan is timed together with buffer
+        root.refresh()
+        root.terminal.get_plan()
+
+    keys = [curses.KEY_DOWN, curses.KEY_UP]
+
+    def key_navigation():
+        keys.reverse()
+        root.dispatch_key(keys[0])
+        root.update()
+
+    start = time.perf_counter()
+    root.frame()
+    first_frame = time.perf_counter() - start
+
+    results = {
+        "create": {"iterations": 1, "ops_per_sec": 1 / build_time, "mean_ms": build_time * 1000},
+        "first_frame": {"iterations": 1, "ops_per_sec": 1 / first_frame, "mean_ms": first_frame * 1000},
+        "update_full": measure(full_update, min_time, max_iterations, invalidate_all),
+        "update_single_change": measure(single_change, min_time, max_iterations),
+        "build": measure(build, min_time, max_iterations, invalidate_all),
+        "draw": measure(root.terminal.draw, min_time, max_iterations, root.terminal.invalidate_plan),
+        "key_navigation": measure(key_navigation, min_time, max_iterations),
+        "search_elements_by_tag": measure(lambda: layout.search_elements_by_tag("tag3"), min_time, max_iterations),
+    }
+    root.terminal.close()
+
+    return [dict(name=name, size=size, shape=shape, elements=element_count,
+                 bytes_per_element=bytes_per_element, **result)
+            for name, result in results.items()]
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """
+    Finds benchmarks whose ops/sec dropped more than threshold fraction compared with baseline
+
+    :return: Descriptions of regressions
+    """
+    old = {(result["name"], result["size"], result["shape"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = (result["name"], result["size"], result["shape"])
+        if key not in old:
+            continue
+        ratio = result["ops_per_sec"] / old[key]["ops_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append(f"{key[0]} size={key[1]} shape={key[2]}: "
+                               f"{old[key]['ops_per_sec']:.1f} -> {result['ops_per_sec']:.1f} ops/sec ({ratio:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100,10000,100000", help="comma separated widget counts")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma separated tree shapes")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimal measured time per benchmark in seconds")
+    parser.add_argument("--max-iterations", type=int, default=1000, help="maximal iterations per benchmark")
+    parser.add_argument("--output", help="path of JSON file to save results")
+    parser.add_argument("--compare", help="path of JSON file with baseline results")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed ops/sec drop fraction")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in map(int, args.sizes.split(",")):
+        for shape in args.shapes.split(","):
+            for result in bench_tree(size, shape, args.min_time, args.max_iterations):
+                results.append(result)
+                print(f"{result['name']:<24} size={size:<7} shape={shape:<5} "
+                      f"{result['ops_per_sec']:>12.1f} ops/sec {result['mean_ms']:>10.3f} ms "
+                      f"{result['bytes_per_element']:>8.0f} B/element")
+
+    report = {"format": FORMAT_VERSION,
+              "meta": {"shellui": __version__,
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
 from .interfaces import *
 from .types import *
 from .debug import *
+from .text import *
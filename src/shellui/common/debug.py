@@ -1,4 +1,7 @@
 import logging as _logging
+import sys as _sys
+import time as _time
+from collections import deque as _deque
 
 logger = _logging.getLogger("shelluiStream")
 logger.handlers = [h for h in logger.handlers if not isinstance(h, _logging.StreamHandler)]
@@ -20,6 +23,32 @@ logger.keyboard = create_level(KEYBOARD, "KEYBOARD")
 CREATE = 7
 logger.create = create_level(CREATE, "CREATE")
 
+_instrumentation_hooks = []
+_file_handler = None
+
+
+def add_instrumentation_hook(hook):
+    """
+    Registers function that rebinds instrumented code paths according to current logging level.
+    Hook is called immediately and after every debug_start and debug_stop call.
+
+    :param hook: Function without arguments
+    :return: Same function
+    """
+    _instrumentation_hooks.append(hook)
+    hook()
+    return hook
+
+
+def update_instrumentation() -> None:
+    """
+    Calls all instrumentation hooks, must be called after changing shelluiStream logger level manually.
+
+    :rtype: None
+    """
+    for hook in _instrumentation_hooks:
+        hook()
+
 
 def debug_start(logging_filename: str = "shellui.log",
                 logging_level: int = CREATE,
@@ -36,12 +65,197 @@ def debug_start(logging_filename: str = "shellui.log",
                 "start cmd /c powershell.exe -Command type traceback.log; Write-Host '\033[31mError traceback log is saved to traceback.log file\033[0m'; pause",
                 shell=True)
 
-    import sys
-    sys.excepthook = exception_handler
+    global _file_handler
+    _sys.excepthook = exception_handler
 
-    file_handler = _logging.FileHandler(logging_filename, mode="w")
-    file_handler.setLevel(logging_level)
-    file_handler.setFormatter(_logging.Formatter(logging_format))
+    if _file_handler is not None:
+        logger.removeHandler(_file_handler)
+        _file_handler.close()
+    _file_handler = _logging.FileHandler(logging_filename, mode="w")
+    _file_handler.setLevel(logging_level)
+    _file_handler.setFormatter(_logging.Formatter(logging_format))
 
     logger.setLevel(logging_level)
-    logger.addHandler(file_handler)
+    logger.addHandler(_file_handler)
+    update_instrumentation()
+
+
+def debug_stop() -> None:
+    """
+    Stops logging started by debug_start and switches instrumented code paths to fast calls.
+
+    :rtype: None
+    """
+    global _file_handler
+    _sys.excepthook = _sys.__excepthook__
+
+    if _file_handler is not None:
+        logger.removeHandler(_file_handler)
+        _file_handler.close()
+        _file_handler = None
+
+    logger.setLevel(_logging.NOTSET)
+    update_instrumentation()
+
+
+class Profiler:
+    """
+    Records wall time of element events and frames. Used through profiler instance,
+    started by profile_start and stopped by profile_stop, costs nothing while stopped.
+    """
+    FRAME_BUCKETS_MS = (1, 2, 4, 8, 16, 33, 50, 100, 250, 500, 1000)
+    """Upper bounds of frame time histogram buckets in milliseconds"""
+
+    def __init__(self, frames_count: int = 1000):
+        """
+        :param frames_count: Count of last frames kept for frame time histogram
+        """
+        self.enabled: bool = False
+        self.events: dict = {}
+        """Calls count, total and maximal time in seconds by (class name, tag, event name)"""
+        self.stacks: dict = {}
+        """Self time in seconds by collapsed call stack"""
+        self.frame_times: _deque = _deque(maxlen=frames_count)
+        """Last frame times in seconds"""
+        self._stack: list = []
+
+    def reset(self, frames_count: int = None) -> None:
+        """
+        Drops recorded data
+
+        :param frames_count: New count of last frames kept for histogram
+        """
+        self.events, self.stacks = {}, {}
+        self.frame_times = _deque(maxlen=frames_count or self.frame_times.maxlen)
+        self._stack = []
+
+    def measure(self, element, event_name: str, function, *args, **kwargs):
+        """
+        Calls function and records its wall time as element event
+
+        :param element: Element or other object with optional tag attribute
+        :param event_name: Event name
+        :param function: Measured function
+        :return: Function result
+        """
+        key = (element.__class__.__name__, str(getattr(element, "tag", "")), event_name)
+        name = f"{key[0]}[{key[1]}].{event_name}".replace(";", ":")
+        path = f"{self._stack[-1][0]};{name}" if self._stack else name
+        frame = [path, 0.0]
+        self._stack.append(frame)
+        start = _time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = _time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            stat = self.events.get(key)
+            if stat is None:
+                stat = self.events[key] = [0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += elapsed
+            if elapsed > stat[2]:
+                stat[2] = elapsed
+            self.stacks[path] = self.stacks.get(path, 0.0) + elapsed - frame[1]
+
+    def measure_frame(self, element, function, *args, **kwargs):
+        """
+        Calls function that draws full frame and records its time in frame time histogram
+
+        :return: Function result
+        """
+        start = _time.perf_counter()
+        try:
+            return self.measure(element, "frame", function, *args, **kwargs)
+        finally:
+            self.frame_times.append(_time.perf_counter() - start)
+
+    def get_stats(self, group_by: str = "element") -> list:
+        """
+        Returns recorded event times sorted by total time
+
+        :param group_by: "element" - by class, tag and event, "class" - by class and event, "tag" - by tag and event
+        :return: List of dicts with class, tag, event, calls, total, mean and max keys, times are in seconds
+        """
+        groups = {}
+        for (class_name, tag, event_name), (calls, total, maximum) in self.events.items():
+            key = (class_name if group_by != "tag" else None, tag if group_by != "class" else None, event_name)
+            group = groups.setdefault(key, [0, 0.0, 0.0])
+            group[0] += calls
+            group[1] += total
+            group[2] = max(group[2], maximum)
+        return sorted(({"class": class_name, "tag": tag, "event": event_name,
+                        "calls": calls, "total": total, "mean": total / calls, "max": maximum}
+                       for (class_name, tag, event_name), (calls, total, maximum) in groups.items()),
+                      key=lambda stat: stat["total"], reverse=True)
+
+    def get_frame_histogram(self) -> list:
+        """
+        Returns histogram of last frame times
+
+        :return: List of (upper bound in milliseconds, frames count) pairs, last bound is infinity
+        """
+        bounds = self.FRAME_BUCKETS_MS + (float("inf"), )
+        counts = [0] * len(bounds)
+        for frame_time in self.frame_times:
+            milliseconds = frame_time * 1000
+            for index, bound in enumerate(bounds):
+                if milliseconds <= bound:
+                    counts[index] += 1
+                    break
+        return list(zip(bounds, counts))
+
+    def get_frame_stats(self) -> dict:
+        """
+        Returns statistics of last frame times
+
+        :return: Dict with count, mean, p50, p95, p99 and max keys, times are in seconds
+        """
+        times = sorted(self.frame_times)
+        if not times:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def percentile(fraction):
+            return times[min(int(fraction * len(times)), len(times) - 1)]
+
+        return {"count": len(times), "mean": sum(times) / len(times),
+                "p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99), "max": times[-1]}
+
+    def dump_collapsed(self, filename: str) -> None:
+        """
+        Saves self times of call stacks in collapsed stack format supported by flame graph tools,
+        values are in microseconds
+
+        :param filename: Output file name
+        """
+        with open(filename, "w") as file:
+            for path, seconds in self.stacks.items():
+                file.write(f"{path} {max(int(seconds * 1_000_000), 0)}\n")
+
+
+profiler = Profiler()
+
+
+def profile_start(frames_count: int = 1000) -> None:
+    """
+    Drops recorded data and starts recording event and frame times.
+
+    :param frames_count: Count of last frames kept for frame time histogram
+    :rtype: None
+    """
+    profiler.reset(frames_count)
+    profiler.enabled = True
+    update_instrumentation()
+
+
+def profile_stop() -> None:
+    """
+    Stops recording, recorded data stays available in profiler.
+
+    :rtype: None
+    """
+    profiler.enabled = False
+    update_instrumentation()
+
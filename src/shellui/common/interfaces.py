@@ -1,4 +1,4 @@
-from typing import Protocol, runtime_checkable, List, Callable, Any, Union, Tuple
+from typing import Protocol, runtime_checkable, List, Callable, Any, Union, Tuple, Optional, Iterable
 
 
 @runtime_checkable
@@ -9,7 +9,11 @@ class BaseElementInterface(Protocol): ...
 class KeyboardManagerInterface(Protocol):
     parent: BaseElementInterface
     keyboard_events: List['KeyboardEvent']
-    def add_keyboard_event(self, function: Callable, _lambda: Callable = lambda key_char: True) -> 'KeyboardEvent': ...
+    keymaps: dict
+    mode: Optional[str]
+    def add_keyboard_event(self, function: Callable, _lambda: Callable = None, keys: Iterable = None, mode: str = None) -> 'KeyboardEvent': ...
+    def remove_keyboard_event(self, event: 'KeyboardEvent') -> None: ...
+    def set_mode(self, mode: Optional[str] = None) -> None: ...
     def key_pressed(self, key_char) -> List[Any]: ...
 
 
@@ -44,6 +48,7 @@ class EventManagerInterface(Protocol):
     call: CallInterface
     def __init__(self, parent: object): ...
     def set_events(self, *args, **kwargs): ...
+    def reset_events(self, *event_names: str) -> None: ...
     def call_event(self, event_name: str) -> Any: ...
 
 
@@ -53,6 +58,7 @@ class BaseElementInterface(Protocol):
     size: 'Position'
     tag: str
     state: 'ElementState'
+    flag_bits: int
     flags: FlagsManagerInterface
     keyboard: KeyboardManagerInterface
     event: EventManagerInterface
@@ -69,4 +75,6 @@ class BaseElementInterface(Protocol):
 class AbstractLayoutInterface(BaseElementInterface, Protocol):
     elements: 'Collection'
     def add_elements(self, *args, **kwargs) -> Union[BaseElementInterface, 'Collection']: ...
+    def remove_elements(self, *elements: BaseElementInterface) -> 'Collection': ...
     def search_elements_by_tag(self, tag: str) -> 'Collection': ...
+    def search_elements_by_class(self, cls: type) -> 'Collection': ...
@@ -0,0 +1,114 @@
+from typing import List, Tuple, Dict
+from functools import lru_cache
+import unicodedata
+
+
+_char_widths: Dict[str, int] = {}
+"""Lookup table of measured non-ASCII character widths"""
+
+
+def _measure_char(char: str) -> int:
+    code = ord(char)
+    if code < 0x20 or 0x7F <= code < 0xA0:
+        return 0
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+    if 0x1160 <= code <= 0x11FF:
+        # Hangul medial vowels and final consonants join preceding syllable
+        return 0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return 2
+    return 1
+
+
+def char_width(char: str) -> int:
+    """
+    Returns count of terminal cells taken by character.
+
+    :param char: Single character
+    :type char: str
+    :return: 0 for combining and control characters, 2 for wide and fullwidth East Asian characters, else 1
+    :rtype: int
+    """
+    width = _char_widths.get(char, None)
+    if width is None:
+        width = _char_widths[char] = _measure_char(char)
+    return width
+
+
+def text_width(text: str) -> int:
+    """
+    Returns count of terminal cells taken by single line of text.
+
+    :param text: Single line of text
+    :type text: str
+    :rtype: int
+    """
+    # printable ASCII characters take one cell each, ASCII control characters take none
+    if text.isascii() and text.isprintable():
+        return len(text)
+    return sum(char_width(char) for char in text)
+
+
+@lru_cache(maxsize=4096)
+def text_cells(text: str) -> Tuple[str, ...]:
+    """
+    Splits single line of text into terminal cells. Wide character is followed by empty continuation cell,
+    zero width characters are joined with the preceding cell.
+
+    :param text: Single line of text
+    :type text: str
+    :return: Cell contents
+    :rtype: typing.Tuple[str, ...]
+    """
+    if text.isascii() and text.isprintable():
+        return tuple(text)
+    cells: List[str] = []
+    for char in text:
+        width = char_width(char)
+        if width == 0:
+            if cells:
+                cells[-1 if cells[-1] else -2] += char
+        elif width == 2:
+            cells.append(char)
+            cells.append("")
+        else:
+            cells.append(char)
+    return tuple(cells)
+
+
+class TextMetrics:
+    """
+    Represents measured multiline text.
+    """
+    __slots__ = ("lines", "line_offsets", "line_widths", "width", "height")
+
+    def __init__(self, text: str):
+        """
+        :param text: Measured text
+        """
+        self.lines: List[str] = text.split("\n")
+        """Text lines without line breaks"""
+        self.line_offsets: List[int] = []
+        """Index of first character of every line in text"""
+        self.line_widths: List[int] = [text_width(line) for line in self.lines]
+        """Count of cells taken by every line"""
+        offset = 0
+        for line in self.lines:
+            self.line_offsets.append(offset)
+            offset += len(line) + 1
+        self.width: int = max(self.line_widths)
+        """Width of the widest line in cells"""
+        self.height: int = len(self.lines)
+
+
+@lru_cache(maxsize=4096)
+def measure_text(text: str) -> TextMetrics:
+    """
+    Returns metrics of text, metrics of recently measured texts are reused.
+
+    :param text: Multiline text
+    :type text: str
+    :rtype: TextMetrics
+    """
+    return TextMetrics(text)
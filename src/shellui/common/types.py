@@ -1,5 +1,5 @@
 from .interfaces import BaseElementInterface
-from .debug import logger
+from .debug import logger, add_instrumentation_hook, profiler, EVENT
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 from typing import *
@@ -20,28 +20,45 @@ class ElementState(Enum):
     SELECTED    = 1
 
 
-@dataclass
 class Dimensions(ABC):
     """
-    Represent abstract base class of dimensions with basic arithmetic operations.
+    Represent abstract base class of immutable slotted dimensions with basic arithmetic operations.
+    Subclasses keep values in slots aliased as _x and _y and set them only in __init__.
     """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{self.__class__.__name__}' object is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{self.__class__.__name__}' object is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self._x, self._y)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.__slots__[0]}={self._x!r}, {self.__slots__[1]}={self._y!r})"
 
     def __iter__(self):
-        yield self._x
-        yield self._y
+        return iter((self._x, self._y))
+
+    def __hash__(self):
+        return hash((self._x, self._y))
 
     def __add__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__class__(self._x + other._x, self._y + other._y)
+        cls = self.__class__
+        if other.__class__ is cls:
+            return cls(self._x + other._x, self._y + other._y)
         elif isinstance(other, (int, float)):
-            return self.__class__(self._x + other, self._y + other)
+            return cls(self._x + other, self._y + other)
         return NotImplemented
 
     def __sub__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__class__(self._x - other._x, self._y - other._y)
+        cls = self.__class__
+        if other.__class__ is cls:
+            return cls(self._x - other._x, self._y - other._y)
         elif isinstance(other, (int, float)):
-            return self.__class__(self._x - other, self._y - other)
+            return cls(self._x - other, self._y - other)
         return NotImplemented
 
     def __mul__(self, other):
@@ -68,53 +85,61 @@ class Dimensions(ABC):
         return self.__class__(-self._x, -self._y)
 
     def __eq__(self, other):
-        if isinstance(other, self.__class__):
+        if other.__class__ is self.__class__:
             return self._x == other._x and self._y == other._y
         return NotImplemented
 
 
-@dataclass
 class Position(Dimensions):
     """
-    Represents a position in a 2D space.
+    Represents an immutable position in a 2D space.
 
     :param x: X-coordinate of the position.
     :type x: int
     :param y: Y-coordinate of the position.
     :type y: int
     """
+    __slots__ = ("x", "y")
     x: int
     y: int
 
-    @property
-    def _x(self):
-        return self.x
+    def __init__(self, x: int, y: int):
+        _set_position_x(self, x)
+        _set_position_y(self, y)
 
-    @property
-    def _y(self):
-        return self.y
+    def replace(self, x: int = None, y: int = None) -> Self:
+        """
+        Returns copy of position with given coordinates changed.
+
+        :rtype: Position
+        """
+        return Position(self.x if x is None else x, self.y if y is None else y)
+
+
+Position._x, Position._y = Position.x, Position.y
+_set_position_x, _set_position_y = Position.x.__set__, Position.y.__set__
 
 
-@dataclass
 class Size(Dimensions):
     """
-    Represents the size with width and height.
+    Represents the immutable size with width and height.
 
     :param width: Width dimension.
     :type width: int
     :param height: Height dimension.
     :type height: int
     """
+    __slots__ = ("width", "height")
     width: int
     height: int
 
-    @property
-    def _x(self):
-        return self.width
+    def __init__(self, width: int, height: int):
+        _set_size_width(self, width)
+        _set_size_height(self, height)
+
 
-    @property
-    def _y(self):
-        return self.height
+Size._x, Size._y = Size.width, Size.height
+_set_size_width, _set_size_height = Size.width.__set__, Size.height.__set__
 
 
 @dataclass
@@ -126,13 +151,19 @@ class KeyboardEvent:
     :type function: typing.Callable[[], typing.Any]
     :param rule: Condition function for filtering elements
     :type rule: typing.Callable[[int], bool]
+    :param keys: Key code sequences the event is bound to, empty if event is matched by rule only
+    :type keys: typing.Tuple[typing.Tuple[int, ...], ...]
+    :param mode: Keyboard mode in which the event is active, None if event is active in all modes
+    :type mode: typing.Optional[str]
     """
 
     function: Callable[[], Any]
     rule: Callable[[int], bool]
+    keys: Tuple[Tuple[int, ...], ...] = ()
+    mode: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class EventUnit:
     """
     Represents event unit that associated function with EventManager class
@@ -140,6 +171,7 @@ class EventUnit:
     event_name: str
     parent: BaseElementInterface
     """Parent class object"""
+    function: Callable = None
 
     def __setfunc__(self, function: Callable = None):
         """
@@ -153,12 +185,32 @@ class EventUnit:
     def __call__(self, *args, **kwargs):
         """
         Calls function with the passed arguments.
+        Bound to __direct_call__, __logged_call__ or __profiled_call__ depending on EVENT logging level and profiler state.
 
         :param args: Positional arguments that will be passed to function
         :type args: typing.List
         :param kwargs: Named arguments that will be passed to function
         :type kwargs: typing.Dict
         """
+        return self.function(*args, **kwargs)
+
+    def __direct_call__(self, *args, **kwargs):
+        """
+        Calls function with the passed arguments without logging.
+        """
+        return self.function(*args, **kwargs)
+
+    def __profiled_call__(self, *args, **kwargs):
+        """
+        Calls function with the passed arguments and records its time in profiler.
+        """
+        call = self.__logged_call__ if logger.isEnabledFor(EVENT) else self.function
+        return profiler.measure(self.parent, self.event_name, call, *args, **kwargs)
+
+    def __logged_call__(self, *args, **kwargs):
+        """
+        Logs event call and calls function with the passed arguments.
+        """
         args_str = ', '.join(repr(arg) for arg in args[:2]) or None
         if len(args) > 2:
             args_str += ', ...'
@@ -172,6 +224,16 @@ class EventUnit:
         return self.function(*args, **kwargs)
 
 
+@add_instrumentation_hook
+def _bind_event_unit_call() -> None:
+    if profiler.enabled:
+        EventUnit.__call__ = EventUnit.__profiled_call__
+    elif logger.isEnabledFor(EVENT):
+        EventUnit.__call__ = EventUnit.__logged_call__
+    else:
+        EventUnit.__call__ = EventUnit.__direct_call__
+
+
 @dataclass
 class Buffer:
     """
@@ -183,10 +245,136 @@ class Buffer:
     :type position: Position
     :param size: Size of buffer in terminal
     :type size: Size
+    :param attr: Curses attribute applied to printed text
+    :type attr: int
+    :param element: Element that built buffer, its version tells whether buffer contents changed
+    :type element: Any
     """
     function: Callable[[], Union[str, List[Self]]] = None
     position: Position = None
     size: Size = None
+    attr: int = 0
+    element: Any = None
+
+
+@dataclass
+class FrameStats:
+    """
+    Represents counters of cells written to terminal by frame drawing.
+
+    :param cells_written: Count of cells written in the last frame
+    :type cells_written: int
+    :param runs_written: Count of changed cell runs written in the last frame
+    :type runs_written: int
+    :param frames: Count of drawn frames
+    :type frames: int
+    :param total_cells_written: Count of cells written in all frames
+    :type total_cells_written: int
+    """
+    cells_written: int = 0
+    runs_written: int = 0
+    frames: int = 0
+    total_cells_written: int = 0
+
+
+@dataclass(slots=True)
+class KeyInput:
+    """
+    Represents key read from terminal, repeated presses of the same key in a row are merged.
+
+    :param key: Key code
+    :type key: int
+    :param count: Count of presses in a row
+    :type count: int
+    """
+    key: int
+    count: int = 1
+
+
+@dataclass(slots=True)
+class PasteInput:
+    """
+    Represents text pasted into terminal with bracketed paste.
+
+    :param text: Pasted text
+    :type text: str
+    """
+    text: str
+
+
+@dataclass(slots=True)
+class MouseInput:
+    """
+    Represents mouse button or wheel event read from terminal.
+
+    :param y: Row of pointer
+    :type y: int
+    :param x: Column of pointer
+    :type x: int
+    :param button: 1 - left, 2 - middle, 3 - right button, 4 - wheel up, 5 - wheel down
+    :type button: int
+    :param pressed: False if button was released
+    :type pressed: bool
+    """
+    y: int
+    x: int
+    button: int
+    pressed: bool = True
+
+
+_checked_types: Set[Tuple[type, type]] = set()
+"""Pairs of interface and element class that passed Collection type check"""
+
+
+flag_registry: Dict[str, int] = {}
+"""Bits of named element flags"""
+
+
+def register_flag(name: str) -> int:
+    """
+    Returns bit of named flag, registers flag if it is new.
+
+    :param name: Flag name
+    :type name: str
+    :return: Flag bit
+    :rtype: int
+    """
+    bit = flag_registry.get(name)
+    if bit is None:
+        bit = flag_registry[name] = 1 << len(flag_registry)
+    return bit
+
+
+def get_flags_mask(*names: str) -> int:
+    """
+    Returns mask of named flags.
+
+    :param names: Flag names
+    :type names: str
+    :return: Bits of all flags
+    :rtype: int
+    """
+    mask = 0
+    for name in names:
+        mask |= register_flag(name)
+    return mask
+
+
+def flags_to_bits(flags: Dict[str, bool]) -> int:
+    """
+    Registers flags and returns bits of flags set to True.
+
+    :param flags: Flag values by name
+    :type flags: typing.Dict[str, bool]
+    :return: Flags bitset
+    :rtype: int
+    """
+    bits = 0
+    for name, value in flags.items():
+        bit = register_flag(name)
+        if value:
+            bits |= bit
+    return bits
 
 
 @dataclass
@@ -204,21 +392,32 @@ class Collection(list):
         if elements is None:
             elements = []
         for element in elements:
-            if not isinstance(element, self.interface_level):
-                raise TypeError(f"Expected type '{self.interface_level}', got '{type(element)}' instead")
+            self._check_type(element)
         super().__init__(elements)
 
     def __str__(self) -> str:
         return f"[{', '.join(str(element) for element in self)}]"
 
-    def append(self, element: interface_level):
+    def _check_type(self, element: interface_level) -> None:
+        """
+        Checks element type, protocol check result is cached by element class because it is slow.
+
+        :param element: Element to check
+        :raises TypeError: If element does not implement interface_level
+        """
+        key = (self.interface_level, type(element))
+        if key in _checked_types:
+            return
         if not isinstance(element, self.interface_level):
             raise TypeError(f"Expected type '{self.interface_level}', got '{type(element)}' instead")
+        _checked_types.add(key)
+
+    def append(self, element: interface_level):
+        self._check_type(element)
         super().append(element)
 
     def insert(self, index: int, element: interface_level):
-        if not isinstance(element, self.interface_level):
-            raise TypeError(f"Expected type '{self.interface_level}', got '{type(element)}' instead")
+        self._check_type(element)
         super().insert(index, element)
 
     def set_elements_attribute(self,
@@ -260,9 +459,32 @@ class Collection(list):
                 return_list.append(element)
         return return_list
 
+    def get_elements_by_flags(self, include: int = 0, exclude: int = 0, include_any: int = 0) -> Self:
+        """
+        Returns filtered collection of elements that have all include flags, none of exclude flags
+        and at least one of include_any flags set.
+
+        :param include: Mask of flags that must be set
+        :type include: int
+        :param exclude: Mask of flags that must not be set
+        :type exclude: int
+        :param include_any: Mask of flags of which at least one must be set, 0 for no such condition
+        :type include_any: int
+        :return: Filtered collection of elements
+        :rtype: Collection
+        """
+        mask = include | exclude
+        return_list: Collection = Collection()
+        if include_any:
+            list.extend(return_list, [element for element in self
+                                      if element.flag_bits & mask == include and element.flag_bits & include_any])
+        else:
+            list.extend(return_list, [element for element in self if element.flag_bits & mask == include])
+        return return_list
+
     def call_elements_event(self,
                             event: Text,
-                            rule: Callable[[BaseElementInterface], bool] = lambda element: True,
+                            rule: Callable[[BaseElementInterface], bool] = None,
                             args: List = None,
                             kwargs: Dict = None) -> List[Any]:
         """
@@ -270,8 +492,8 @@ class Collection(list):
 
         :param event: Event name
         :type event: typing.Text
-        :param rule: Condition function for filtering elements
-        :type rule: typing.Callable[[BaseElementInterface], bool]
+        :param rule: Condition function for filtering elements, all elements are used if it is None
+        :type rule: typing.Optional[typing.Callable[[BaseElementInterface], bool]]
         :param args: Positional arguments that will be passed to event
         :type args: typing.List
         :param kwargs: Named arguments that will be passed to event
@@ -281,6 +503,6 @@ class Collection(list):
         """
         args, kwargs = args or [], kwargs or {}
         return_list: List[Any] = []
-        for element in self.get_elements_collection(rule):
+        for element in (self if rule is None else self.get_elements_collection(rule)):
             return_list.append(getattr(element.event.call, event)(*args, **kwargs))
         return return_list
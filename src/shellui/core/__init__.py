@@ -1,2 +1,8 @@
 from .handler import *
+from .frame import *
+from .region import *
+from .hittest import *
+from .backend import *
 from .terminal import *
+from .loop import *
+from .input import *
@@ -0,0 +1,587 @@
+from ..common.types import ABC, abstractmethod, Optional, Size, Union, Dict, Tuple, List, Any, MouseInput
+from ..common.text import text_width
+from .frame import Frame
+from collections import deque
+import curses
+import threading
+import select
+import signal
+import sys
+import os
+try:
+    import termios
+except ImportError:
+    termios = None
+
+
+class TerminalBackend(ABC):
+    """
+    Represents abstract screen and keyboard device used by Terminal
+    """
+    MERGE_GAP: int = 0
+    """Count of unchanged cells between two changed runs that are written again instead of moving cursor over them"""
+
+    @abstractmethod
+    def start(self) -> None:
+        """
+        Prepares device for drawing and reading keys
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_size(self) -> Size:
+        """
+        Returns screen size in cells
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def write(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        """
+        Writes single line of text starting at given cell
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Makes written text visible
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(self) -> int:
+        """
+        Reads key code, returns -1 if there is no key in non-blocking mode
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_blocking(self, blocking: bool) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Restores device to its original state
+        """
+        raise NotImplementedError
+
+    def fileno(self) -> Optional[int]:
+        """
+        Returns file descriptor that becomes readable when key is pressed, None if there is no such descriptor
+        """
+        return None
+
+    def resize(self) -> Size:
+        """
+        Adapts device to new terminal size after KEY_RESIZE was read and clears screen
+
+        :return: New screen size
+        """
+        return self.get_size()
+
+    def resize_fileno(self) -> Optional[int]:
+        """
+        Returns file descriptor that becomes readable when terminal is resized, if fileno does not
+        """
+        return None
+
+    def set_mouse(self, enabled: bool) -> None:
+        """
+        Enables reporting of mouse events as KEY_MOUSE keys
+        """
+
+    def read_mouse(self) -> Optional[MouseInput]:
+        """
+        Returns mouse event of the last read KEY_MOUSE key, None if it can not be read
+        """
+        return None
+
+    def set_bracketed_paste(self, enabled: bool) -> None:
+        """
+        Asks terminal to surround pasted text with PASTE_START and PASTE_END key sequences
+        """
+
+
+class CursesBackend(TerminalBackend):
+    """
+    Represents backend that draws to real terminal using curses
+    """
+    def __init__(self):
+        self.stdscr = None
+
+    def start(self) -> None:
+        self.stdscr = curses.initscr()
+        self.stdscr.keypad(True)
+        curses.noecho()
+        curses.curs_set(0)
+
+    def get_size(self) -> Size:
+        height, width = self.stdscr.getmaxyx()
+        return Size(width, height)
+
+    def write(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        try:
+            self.stdscr.addstr(y, x, text, attr)
+        except curses.error:
+            # curses raises after writing the bottom right cell because cursor can not advance
+            pass
+
+    def flush(self) -> None:
+        self.stdscr.noutrefresh()
+        curses.doupdate()
+
+    def read(self) -> int:
+        return self.stdscr.getch()
+
+    def set_blocking(self, blocking: bool) -> None:
+        self.stdscr.nodelay(not blocking)
+
+    def set_bracketed_paste(self, enabled: bool) -> None:
+        sys.stdout.write("\x1b[?2004h" if enabled else "\x1b[?2004l")
+        sys.stdout.flush()
+
+    MOUSE_BUTTONS: Tuple[Tuple[int, int, bool], ...] = tuple(
+        (getattr(curses, f"BUTTON{button}_{state}", 0), button, state != "RELEASED")
+        for button in range(1, 6) for state in ("PRESSED", "CLICKED", "DOUBLE_CLICKED", "TRIPLE_CLICKED", "RELEASED"))
+    """Curses button state masks, button numbers and whether button is pressed"""
+
+    def set_mouse(self, enabled: bool) -> None:
+        curses.mousemask(curses.ALL_MOUSE_EVENTS if enabled else 0)
+        curses.mouseinterval(0)
+
+    def read_mouse(self) -> Optional[MouseInput]:
+        try:
+            _, x, y, _, state = curses.getmouse()
+        except curses.error:
+            return None
+        for mask, button, pressed in self.MOUSE_BUTTONS:
+            if mask and state & mask:
+                return MouseInput(y, x, button, pressed)
+        return None
+
+    def resize(self) -> Size:
+        width, height = os.get_terminal_size(self.fileno() or 0)
+        if curses.is_term_resized(height, width):
+            curses.resizeterm(height, width)
+        curses.update_lines_cols()
+        self.stdscr.clear()
+        return self.get_size()
+
+    def close(self) -> None:
+        curses.endwin()
+
+    def fileno(self) -> Optional[int]:
+        try:
+            return sys.stdin.fileno()
+        except (AttributeError, ValueError, OSError):
+            return None
+
+
+class AnsiBackend(TerminalBackend):
+    """
+    Represents backend that writes ANSI escape sequences straight to terminal without curses.
+    Sequences of frame are collected in one reusable buffer and sent with one write call on flush
+    """
+    SGR_CODES: Tuple[Tuple[int, int], ...] = ((curses.A_BOLD, 1), (curses.A_DIM, 2), (getattr(curses, "A_ITALIC", 0), 3),
+                                              (curses.A_UNDERLINE, 4), (curses.A_BLINK, 5), (curses.A_REVERSE, 7),
+                                              (curses.A_STANDOUT, 7), (curses.A_INVIS, 8))
+    """Curses attributes and their Select Graphic Rendition parameters"""
+    ESCAPE_KEYS: Dict[bytes, int] = {b"[A": curses.KEY_UP, b"[B": curses.KEY_DOWN, b"[C": curses.KEY_RIGHT,
+                                     b"[D": curses.KEY_LEFT, b"OA": curses.KEY_UP, b"OB": curses.KEY_DOWN,
+                                     b"OC": curses.KEY_RIGHT, b"OD": curses.KEY_LEFT, b"[H": curses.KEY_HOME,
+                                     b"[F": curses.KEY_END, b"OH": curses.KEY_HOME, b"OF": curses.KEY_END,
+                                     b"[Z": curses.KEY_BTAB, b"[2~": curses.KEY_IC, b"[3~": curses.KEY_DC,
+                                     b"[5~": curses.KEY_PPAGE, b"[6~": curses.KEY_NPAGE}
+    """Escape sequences without leading ESC and key codes curses returns for them"""
+    ESCAPE_DELAY: float = 0.025
+    """Seconds read waits for the rest of escape sequence split between reads"""
+    MERGE_GAP: int = 3
+    """Rewriting up to three cells is not longer than the shortest cursor move over them"""
+
+    def __init__(self, input_fd: int = None, output_fd: int = None, synchronized: bool = True,
+                 alternate_screen: bool = True, color_pairs: Dict[int, Tuple[int, int]] = None):
+        """
+        :param input_fd: File descriptor keys are read from, standard input by default
+        :param output_fd: File descriptor of terminal, standard output by default
+        :param synchronized: Surround every frame with synchronized output markers (DEC mode 2026),
+                             terminals that do not support it ignore them
+        :param alternate_screen: Draw on alternate screen that is restored on close
+        :param color_pairs: Foreground and background colors (0-255, -1 for default) of curses color pair numbers
+        """
+        self.input_fd: int = sys.stdin.fileno() if input_fd is None else input_fd
+        self.output_fd: int = sys.stdout.fileno() if output_fd is None else output_fd
+        self.synchronized: bool = synchronized
+        self.alternate_screen: bool = alternate_screen
+        self.color_pairs: Dict[int, Tuple[int, int]] = color_pairs or {}
+        self.blocking: bool = True
+        self.bytes_written: int = 0
+        """Count of bytes sent to terminal"""
+        self._output: bytearray = bytearray()
+        """Sequences of current frame"""
+        self._cursor: Optional[Tuple[int, int]] = None
+        """Cursor position, None when it is unknown"""
+        self._attr: Optional[int] = None
+        self._width: int = 80
+        """Screen width returned by last get_size call"""
+        self._sgr_cache: Dict[int, bytes] = {}
+        self._keys: deque = deque()
+        self._saved_mode: Optional[list] = None
+        self._resize_pipe: Optional[Tuple[int, int]] = None
+        """Pipe written by SIGWINCH handler, wakes up waiting read"""
+        self._mouse: deque = deque()
+        """Mouse events of read KEY_MOUSE keys"""
+        self.mouse: bool = False
+        self._saved_handler: Any = None
+
+    def start(self) -> None:
+        if termios is not None:
+            try:
+                self._saved_mode = termios.tcgetattr(self.input_fd)
+            except termios.error:
+                self._saved_mode = None
+        if self._saved_mode is not None:
+            mode = termios.tcgetattr(self.input_fd)
+            # no echo, no line buffering and no output translation, Ctrl-C still raises SIGINT as in cbreak mode
+            mode[0] &= ~(termios.IXON | termios.ICRNL)
+            mode[1] &= ~termios.OPOST
+            mode[3] &= ~(termios.ECHO | termios.ICANON | termios.IEXTEN)
+            mode[6][termios.VMIN], mode[6][termios.VTIME] = 1, 0
+            termios.tcsetattr(self.input_fd, termios.TCSANOW, mode)
+        if hasattr(signal, "SIGWINCH") and threading.current_thread() is threading.main_thread():
+            self._resize_pipe = os.pipe()
+            os.set_blocking(self._resize_pipe[1], False)
+            self._saved_handler = signal.signal(signal.SIGWINCH, self._on_resize_signal)
+        self._output += (b"\x1b[?1049h" if self.alternate_screen else b"") + b"\x1b[?25l\x1b[0m\x1b[2J"
+        self._cursor, self._attr = None, 0
+        self._send()
+
+    def _on_resize_signal(self, signum, frame) -> None:
+        try:
+            os.write(self._resize_pipe[1], b"\0")
+        except OSError:
+            # pipe is full, resize is already reported
+            pass
+
+    def get_size(self) -> Size:
+        try:
+            columns, lines = os.get_terminal_size(self.output_fd)
+        except OSError:
+            columns, lines = 80, 24
+        self._width = columns
+        return Size(columns, lines)
+
+    def get_sgr(self, attr: int) -> bytes:
+        """
+        Returns Select Graphic Rendition sequence that resets attributes and sets curses attribute
+        """
+        sequence = self._sgr_cache.get(attr, None)
+        if sequence is None:
+            parameters: List[str] = ["0"]
+            for flag, code in self.SGR_CODES:
+                if flag and attr & flag and str(code) not in parameters:
+                    parameters.append(str(code))
+            foreground, background = self.color_pairs.get((attr & curses.A_COLOR) >> 8, (-1, -1))
+            if foreground >= 0:
+                parameters.append(f"38;5;{foreground}")
+            if background >= 0:
+                parameters.append(f"48;5;{background}")
+            sequence = self._sgr_cache[attr] = f"\x1b[{';'.join(parameters)}m".encode()
+        return sequence
+
+    @staticmethod
+    def get_move(cursor: Optional[Tuple[int, int]], y: int, x: int) -> bytes:
+        """
+        Returns the shortest sequence that moves cursor to given cell, absolute or relative to cursor
+
+        :param cursor: Cursor position in (y, x) format, None if it is unknown
+        :param y: Row, counted from 0
+        :param x: Column, counted from 0
+        :return: Escape sequence, empty if cursor is already there
+        """
+        absolute = (f"\x1b[{y + 1}H" if x == 0 else f"\x1b[{y + 1};{x + 1}H").encode()
+        if cursor is None:
+            return absolute
+        cursor_y, cursor_x = cursor
+        if (cursor_y, cursor_x) == (y, x):
+            return b""
+        if x == cursor_x:
+            horizontal = b""
+        elif x == 0:
+            horizontal = b"\r"
+        else:
+            step = x - cursor_x
+            relative = (f"\x1b[{abs(step)}" if abs(step) > 1 else "\x1b[") + ("C" if step > 0 else "D")
+            column = f"\x1b[{x + 1}G"
+            horizontal = min(relative, column, key=len).encode()
+        if y == cursor_y:
+            vertical = b""
+        else:
+            step = y - cursor_y
+            relative = (f"\x1b[{abs(step)}" if abs(step) > 1 else "\x1b[") + ("B" if step > 0 else "A")
+            vertical = min(relative, f"\x1b[{y + 1}d", key=len).encode()
+        candidates = [absolute, vertical + horizontal]
+        if x == 0 and y > cursor_y:
+            # carriage return and line feeds move to the start of line with and without output translation
+            candidates.append(b"\r" + b"\n" * (y - cursor_y))
+        return min(candidates, key=len)
+
+    def write(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        output = self._output
+        if not output and self.synchronized:
+            output += b"\x1b[?2026h"
+        output += self.get_move(self._cursor, y, x)
+        if attr != self._attr:
+            output += self.get_sgr(attr)
+            self._attr = attr
+        output += text.encode()
+        x += text_width(text)
+        # cursor that reached the last column waits for wrap, its position is not reliable
+        self._cursor = (y, x) if x < self._width else None
+
+    def flush(self) -> None:
+        if not self._output:
+            return
+        if self.synchronized:
+            self._output += b"\x1b[?2026l"
+        self._send()
+
+    def _send(self) -> None:
+        view = memoryview(self._output)
+        written = 0
+        try:
+            while written < len(view):
+                written += os.write(self.output_fd, view[written:])
+        finally:
+            view.release()
+        self.bytes_written += written
+        # buffer keeps its allocated memory for the next frame
+        del self._output[:]
+
+    def resize(self) -> Size:
+        self._output += b"\x1b[0m\x1b[2J"
+        self._cursor, self._attr = None, 0
+        self._send()
+        return self.get_size()
+
+    def resize_fileno(self) -> Optional[int]:
+        return self._resize_pipe[0] if self._resize_pipe is not None else None
+
+    def _read_keys(self, timeout: Optional[float]) -> None:
+        descriptors = [self.input_fd] + ([self._resize_pipe[0]] if self._resize_pipe is not None else [])
+        ready = select.select(descriptors, [], [], timeout)[0]
+        if self._resize_pipe is not None and self._resize_pipe[0] in ready:
+            os.read(self._resize_pipe[0], 4096)
+            self._keys.append(curses.KEY_RESIZE)
+        if self.input_fd not in ready:
+            return
+        data = os.read(self.input_fd, 4096)
+        # terminal may send escape sequence in several parts, the rest is read before sequences are decoded
+        while self.is_incomplete_escape(data) and select.select([self.input_fd], [], [], self.ESCAPE_DELAY)[0]:
+            rest = os.read(self.input_fd, 4096)
+            if not rest:
+                break
+            data += rest
+        index = 0
+        while index < len(data):
+            byte = data[index]
+            if byte == 27 and data[index + 1:index + 3] == b"[<":
+                index = self._read_mouse_sequence(data, index)
+                continue
+            if byte == 27:
+                for length in (3, 2):
+                    key = self.ESCAPE_KEYS.get(data[index + 1:index + 1 + length], None)
+                    if key is not None:
+                        self._keys.append(key)
+                        index += length + 1
+                        break
+                else:
+                    self._keys.append(byte)
+                    index += 1
+                continue
+            # enter is reported as line feed like curses does
+            self._keys.append(10 if byte == 13 else byte)
+            index += 1
+
+    @staticmethod
+    def is_incomplete_escape(data: bytes) -> bool:
+        """
+        Returns whether data ends with beginning of escape sequence: lone ESC, "ESC O"
+        or control sequence "ESC [" with parameters but without final byte
+        """
+        start = data.rfind(b"\x1b")
+        if start == -1:
+            return False
+        tail = data[start + 1:]
+        if tail in (b"", b"O"):
+            return True
+        # parameter and intermediate bytes of control sequence are in 0x20-0x3f range, final byte is not
+        return tail[:1] == b"[" and all(0x20 <= byte < 0x40 for byte in tail[1:])
+
+    def _read_mouse_sequence(self, data: bytes, index: int) -> int:
+        """
+        Reads SGR mouse sequence "ESC [ < button ; x ; y M" (m for release)
+
+        :return: Index after the sequence
+        """
+        end = index + 3
+        while end < len(data) and data[end] not in b"Mm":
+            end += 1
+        try:
+            code, x, y = (int(part) for part in data[index + 3:end].split(b";"))
+        except ValueError:
+            self._keys.append(27)
+            return index + 1
+        # motion events are not reported
+        if not code & 32:
+            button = 4 + (code & 1) if code & 64 else (code & 3) + 1
+            self._mouse.append(MouseInput(y - 1, x - 1, button, data[end:end + 1] == b"M"))
+            self._keys.append(curses.KEY_MOUSE)
+        return end + 1
+
+    def set_mouse(self, enabled: bool) -> None:
+        self.mouse = enabled
+        self._output += b"\x1b[?1000h\x1b[?1006h" if enabled else b"\x1b[?1000l\x1b[?1006l"
+        self._send()
+
+    def read_mouse(self) -> Optional[MouseInput]:
+        return self._mouse.popleft() if self._mouse else None
+
+    def read(self) -> int:
+        if not self._keys:
+            self._read_keys(None if self.blocking else 0)
+        return self._keys.popleft() if self._keys else -1
+
+    def set_blocking(self, blocking: bool) -> None:
+        self.blocking = blocking
+
+    def set_bracketed_paste(self, enabled: bool) -> None:
+        self._output += b"\x1b[?2004h" if enabled else b"\x1b[?2004l"
+        self._send()
+
+    def close(self) -> None:
+        if self.mouse:
+            self.set_mouse(False)
+        self._output += b"\x1b[0m\x1b[?25h" + (b"\x1b[?1049l" if self.alternate_screen else b"")
+        self._send()
+        if self._saved_mode is not None:
+            termios.tcsetattr(self.input_fd, termios.TCSADRAIN, self._saved_mode)
+            self._saved_mode = None
+        if self._resize_pipe is not None:
+            signal.signal(signal.SIGWINCH, self._saved_handler or signal.SIG_DFL)
+            for descriptor in self._resize_pipe:
+                os.close(descriptor)
+            self._resize_pipe = None
+
+    def fileno(self) -> Optional[int]:
+        return self.input_fd
+
+
+class MemoryBackend(TerminalBackend):
+    """
+    Represents headless backend that keeps screen in memory and reads scripted keys, used for testing and benchmarking
+    """
+    def __init__(self, width: int = 80, height: int = 24):
+        """
+        :param width: Screen width in cells
+        :param height: Screen height in cells
+        """
+        self.screen: Frame = Frame(width, height)
+        """Cells written to screen"""
+        self.keys: deque = deque()
+        """Keys returned by read"""
+        self.blocking: bool = True
+        self.bracketed_paste: bool = False
+        self.mouse: bool = False
+        self.mouse_events: deque = deque()
+        """Mouse events returned by read_mouse"""
+        self.started: bool = False
+        self.writes: int = 0
+        """Count of write calls"""
+        self.cells_written: int = 0
+        """Count of written cells"""
+        self.flushes: int = 0
+        """Count of flush calls"""
+
+    def start(self) -> None:
+        self.started = True
+
+    def get_size(self) -> Size:
+        return Size(self.screen.width, self.screen.height)
+
+    def write(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        self.writes += 1
+        self.cells_written += self.screen.put(y, x, text, attr)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+    def read(self) -> int:
+        """
+        Returns next scripted key or -1 if there are no keys left, never waits
+        """
+        return self.keys.popleft() if self.keys else -1
+
+    def feed(self, *keys: Union[int, str]) -> None:
+        """
+        Adds keys returned by read, strings are split into characters
+
+        :param keys: Key codes or strings
+        """
+        for key in keys:
+            if isinstance(key, str):
+                self.keys.extend(ord(char) for char in key)
+            else:
+                self.keys.append(key)
+
+    def set_blocking(self, blocking: bool) -> None:
+        self.blocking = blocking
+
+    def set_bracketed_paste(self, enabled: bool) -> None:
+        self.bracketed_paste = enabled
+
+    def set_mouse(self, enabled: bool) -> None:
+        self.mouse = enabled
+
+    def read_mouse(self) -> Optional[MouseInput]:
+        return self.mouse_events.popleft() if self.mouse_events else None
+
+    def feed_mouse(self, y: int, x: int, button: int = 1, pressed: bool = True) -> None:
+        """
+        Adds KEY_MOUSE to keys and mouse event returned by read_mouse
+        """
+        self.mouse_events.append(MouseInput(y, x, button, pressed))
+        self.keys.append(curses.KEY_MOUSE)
+
+    def set_size(self, width: int, height: int) -> None:
+        """
+        Resizes screen like terminal window resize does and adds KEY_RESIZE to keys
+
+        :param width: Screen width in cells
+        :param height: Screen height in cells
+        """
+        self.screen = Frame(width, height)
+        self.keys.append(curses.KEY_RESIZE)
+
+    def close(self) -> None:
+        self.started = False
+
+    def reset_stats(self) -> None:
+        self.writes = self.cells_written = self.flushes = 0
+
+    def get_line(self, y: int) -> str:
+        """
+        Returns screen row text without trailing spaces
+        """
+        start = y * self.screen.width
+        return "".join(self.screen.chars[start:start + self.screen.width]).rstrip()
+
+    def get_text(self) -> str:
+        """
+        Returns screen text without trailing spaces and empty bottom lines
+        """
+        return "\n".join(self.get_line(y) for y in range(self.screen.height)).rstrip("\n")
+
+    def get_attr(self, y: int, x: int) -> int:
+        return self.screen.attrs[y * self.screen.width + x]
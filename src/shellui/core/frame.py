@@ -0,0 +1,175 @@
+from ..common.types import List, Tuple, Iterable
+from ..common.text import text_cells
+
+
+class Frame:
+    """
+    Represents a grid of terminal cells, each storing a character and its attribute.
+    Wide character takes two cells, the second one stores empty string.
+    """
+    def __init__(self, width: int, height: int):
+        """
+        :param width: Frame width in cells
+        :param height: Frame height in cells
+        """
+        self.width: int = width
+        self.height: int = height
+        self._blank_chars: List[str] = [" "] * (width * height)
+        self._blank_attrs: List[int] = [0] * (width * height)
+        self.chars: List[str] = self._blank_chars.copy()
+        self.attrs: List[int] = self._blank_attrs.copy()
+
+    def clear(self) -> None:
+        """
+        Fills all cells with blank characters and default attribute.
+
+        :rtype: None
+        """
+        self.chars[:] = self._blank_chars
+        self.attrs[:] = self._blank_attrs
+
+    def put(self, y: int, x: int, text: str, attr: int = 0) -> int:
+        """
+        Writes text line into cells starting at given position. Text outside frame is discarded.
+
+        :param y: Row of first cell
+        :type y: int
+        :param x: Column of first cell
+        :type x: int
+        :param text: Single line of text
+        :type text: str
+        :param attr: Attribute applied to every written cell
+        :type attr: int
+        :return: Count of written cells
+        :rtype: int
+        """
+        if not 0 <= y < self.height or x >= self.width:
+            return 0
+        is_ascii = text.isascii() and text.isprintable()
+        cells = text if is_ascii else text_cells(text)
+        if x < 0:
+            cells, x = cells[-x:], 0
+        space = self.width - x
+        if is_ascii:
+            cells = cells[:space]
+        else:
+            cut = len(cells) > space and cells[space] == ""
+            cells = list(cells[:space])
+            # wide characters cut by frame edges become blank
+            if cells and cells[0] == "":
+                cells[0] = " "
+            if cut:
+                cells[-1] = " "
+        count = len(cells)
+        row_start = y * self.width
+        start = row_start + x
+        end = start + count
+        chars = self.chars
+        # halves of wide characters that are partially overwritten become blank
+        if start > row_start and chars[start] == "":
+            chars[start - 1] = " "
+        if end < row_start + self.width and chars[end] == "":
+            chars[end] = " "
+        chars[start:end] = cells
+        self.attrs[start:end] = [attr] * count
+        return count
+
+    def blit(self, source: 'Frame', y: int, x: int) -> None:
+        """
+        Copies all cells of other frame into rectangle starting at given position. Cells outside frame are discarded.
+
+        :param source: Copied frame
+        :type source: Frame
+        :param y: Row of top left cell
+        :type y: int
+        :param x: Column of top left cell
+        :type x: int
+        :rtype: None
+        """
+        left, right = max(x, 0), min(x + source.width, self.width)
+        if left >= right:
+            return
+        chars, attrs = self.chars, self.attrs
+        for row in range(max(y, 0), min(y + source.height, self.height)):
+            row_start = row * self.width
+            start, end = row_start + left, row_start + right
+            source_start = (row - y) * source.width + left - x
+            # halves of wide characters cut by rectangle edges become blank
+            if left > 0 and chars[start] == "":
+                chars[start - 1] = " "
+            if right < self.width and chars[end] == "":
+                chars[end] = " "
+            chars[start:end] = source.chars[source_start:source_start + right - left]
+            attrs[start:end] = source.attrs[source_start:source_start + right - left]
+            if chars[start] == "":
+                chars[start] = " "
+            if right < x + source.width and source.chars[source_start + right - left] == "":
+                chars[end - 1] = " "
+
+    def diff(self, previous: 'Frame', rows: Iterable[int] = None, gap: int = 0) -> List[Tuple[int, int, str, int]]:
+        """
+        Compares frame with previous one and collects runs of changed cells sharing same attribute.
+
+        :param previous: Frame currently shown on screen
+        :type previous: Frame
+        :param rows: Compared rows, all rows by default
+        :type rows: typing.Iterable[int]
+        :param gap: Count of unchanged cells with the same attribute that are joined into run between two changed cells
+        :type gap: int
+        :return: Changed runs in (y, x, text, attr) format
+        :rtype: typing.List[typing.Tuple[int, int, str, int]]
+        """
+        runs: List[Tuple[int, int, str, int]] = []
+        width = self.width
+        chars, attrs = self.chars, self.attrs
+        old_chars, old_attrs = previous.chars, previous.attrs
+        for y in range(self.height) if rows is None else rows:
+            start, end = y * width, y * width + width
+            if chars[start:end] == old_chars[start:end] and attrs[start:end] == old_attrs[start:end]:
+                continue
+            index = start
+            while index < end:
+                if chars[index] == old_chars[index] and attrs[index] == old_attrs[index]:
+                    index += 1
+                    continue
+                run_start = index
+                if chars[run_start] == "" and run_start > start:
+                    # run that starts at second half of wide character also rewrites its first half
+                    run_start -= 1
+                attr = attrs[run_start]
+                index += 1
+                while index < end and attrs[index] == attr:
+                    if chars[index] != old_chars[index] or attrs[index] != old_attrs[index]:
+                        index += 1
+                        continue
+                    # short gap of unchanged cells is cheaper to write again than to move cursor over
+                    skip = index
+                    while skip < end and skip - index < gap and attrs[skip] == attr and \
+                            chars[skip] == old_chars[skip] and attrs[skip] == old_attrs[skip]:
+                        skip += 1
+                    if skip == index or skip == end or attrs[skip] != attr or \
+                            (chars[skip] == old_chars[skip] and attrs[skip] == old_attrs[skip]):
+                        break
+                    index = skip
+                runs.append((y, run_start - start, "".join(chars[run_start:index]), attr))
+        return runs
+
+    def copy_rows(self, source: 'Frame', rows: Iterable[int] = None) -> None:
+        """
+        Copies rows of frame with the same size, all rows by default.
+
+        :param source: Copied frame
+        :type source: Frame
+        :param rows: Copied rows
+        :type rows: typing.Iterable[int]
+        :rtype: None
+        """
+        if rows is None:
+            self.chars[:] = source.chars
+            self.attrs[:] = source.attrs
+            return
+        width = self.width
+        for y in rows:
+            start, end = y * width, y * width + width
+            self.chars[start:end] = source.chars[start:end]
+            self.attrs[start:end] = source.attrs[start:end]
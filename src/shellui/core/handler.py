@@ -1,5 +1,58 @@
-from ..common.types import Callable, List, Any, BaseElementInterface, EventUnit, KeyboardEvent, Collection, Union, Self, overload
-from ..common.debug import logger
+from ..common.types import Callable, List, Any, BaseElementInterface, EventUnit, KeyboardEvent, Collection, Union, Self, Dict, Tuple, Iterable, Optional, overload, flag_registry, register_flag
+from ..common.debug import logger, profiler, add_instrumentation_hook, KEYBOARD, EVENT
+
+
+KeySequence = Tuple[int, ...]
+
+
+def to_key_sequence(keys: Union[int, str, Iterable[Union[int, str]]]) -> KeySequence:
+    """
+    Converts key code, string or sequence of them to tuple of key codes.
+    String of several characters is treated as sequence of keys.
+
+    :param keys: Key code, string or sequence of them
+    :return: Tuple of key codes
+    """
+    if isinstance(keys, int):
+        return (keys, )
+    if isinstance(keys, str):
+        return tuple(ord(char) for char in keys)
+    return sum((to_key_sequence(key) for key in keys), ())
+
+
+class Keymap:
+    """
+    Stores keyboard events bound to exact key sequences for constant time lookup
+    """
+    def __init__(self):
+        self.bindings: Dict[KeySequence, List[KeyboardEvent]] = {}
+        """Events by complete key sequence"""
+        self.prefixes: Dict[KeySequence, int] = {}
+        """Count of bound sequences that continue given incomplete sequence"""
+
+    def bind(self, sequence: KeySequence, event: KeyboardEvent) -> None:
+        self.bindings.setdefault(sequence, []).append(event)
+        for length in range(1, len(sequence)):
+            self.prefixes[sequence[:length]] = self.prefixes.get(sequence[:length], 0) + 1
+
+    def unbind(self, sequence: KeySequence, event: KeyboardEvent) -> None:
+        events = self.bindings.get(sequence, [])
+        if event not in events:
+            return
+        events.remove(event)
+        if not events:
+            del self.bindings[sequence]
+        for length in range(1, len(sequence)):
+            prefix = sequence[:length]
+            self.prefixes[prefix] -= 1
+            if not self.prefixes[prefix]:
+                del self.prefixes[prefix]
+
+    def get(self, sequence: KeySequence) -> List[KeyboardEvent]:
+        return self.bindings.get(sequence, [])
+
+    def is_prefix(self, sequence: KeySequence) -> bool:
+        return sequence in self.prefixes
 
 
 class KeyboardHandler:
@@ -9,24 +62,136 @@ class KeyboardHandler:
         """
         self.parent: BaseElementInterface = parent or BaseElementInterface
         self.keyboard_events: List[KeyboardEvent] = []
+        """Events matched by rule only, checked for every pressed key"""
+        self.keymaps: Dict[Optional[str], Keymap] = {None: Keymap()}
+        """Keymaps by mode name, None keymap is active in all modes"""
+        self.mode: Optional[str] = None
+        self._pending: KeySequence = ()
 
-    def add_keyboard_event(self, function: Callable, _lambda: Callable = lambda key_char: True) -> KeyboardEvent:
-        event = KeyboardEvent(function, _lambda)
-        self.keyboard_events.append(event)
+    @overload
+    def add_keyboard_event(self, function: Callable, _lambda: Callable = None) -> KeyboardEvent: ...
+    @overload
+    def add_keyboard_event(self, function: Callable, _lambda: Callable = None, keys: Iterable[Union[int, str, Iterable]] = None, mode: str = None) -> KeyboardEvent: ...
+
+    def add_keyboard_event(self, function: Callable, _lambda: Callable = None, keys: Iterable[Union[int, str, Iterable]] = None, mode: str = None) -> KeyboardEvent:
+        """
+        Adds keyboard event. Events with keys are looked up in keymap by exact key sequence,
+        events without keys are matched by rule for every pressed key.
+
+        :param function: Function that takes key code
+        :param _lambda: Rule that takes key code, for events with keys it is checked after lookup
+        :param keys: Key codes, characters or key sequences (chords) the event is bound to
+        :param mode: Keyboard mode in which the event is active, None for all modes
+        :return: Created keyboard event
+        """
+        if keys is None:
+            event = KeyboardEvent(function, _lambda or (lambda key_char: True), mode=mode)
+            self.keyboard_events.append(event)
+        else:
+            event = KeyboardEvent(function, _lambda or (lambda key_char: True),
+                                  tuple(to_key_sequence(key) for key in keys), mode)
+            keymap = self.keymaps.setdefault(mode, Keymap())
+            for sequence in event.keys:
+                keymap.bind(sequence, event)
         return event
 
+    def remove_keyboard_event(self, event: KeyboardEvent) -> None:
+        if event in self.keyboard_events:
+            self.keyboard_events.remove(event)
+        keymap = self.keymaps.get(event.mode)
+        if keymap is not None:
+            for sequence in event.keys:
+                keymap.unbind(sequence, event)
+
+    def set_mode(self, mode: Optional[str] = None) -> None:
+        """
+        Switches keyboard mode and drops unfinished key sequence
+
+        :param mode: Mode name, None for default mode
+        """
+        self.mode = mode
+        self._pending = ()
+
+    def _active_keymaps(self) -> List[Keymap]:
+        if self.mode is not None and self.mode in self.keymaps:
+            return [self.keymaps[self.mode], self.keymaps[None]]
+        return [self.keymaps[None]]
+
+    def _lookup(self, sequence: KeySequence) -> List[KeyboardEvent]:
+        for keymap in self._active_keymaps():
+            events = keymap.get(sequence)
+            if events:
+                return events
+        return []
+
+    def peek(self, key: int) -> Optional[List[KeyboardEvent]]:
+        """
+        Returns events that pressing key would call, without calling them
+
+        :param key: Key code
+        :return: Events or None if key would continue or break unfinished key sequence
+        """
+        sequence = self._pending + (key, )
+        if self._pending or any(keymap.is_prefix(sequence) for keymap in self._active_keymaps()):
+            return None
+        return [event for event in self._lookup(sequence) + self.keyboard_events
+                if (event.mode is None or event.mode == self.mode) and event.rule(key)]
+
     def key_pressed(self, key) -> List[Any]:
+        """
+        Calls events bound to key and events whose rule matches key.
+        Key that continues unfinished key sequence is reported as handled with True.
+        Keys of sequence broken by key are pressed again, the longest bound beginning of sequence is called as one chord.
+
+        :param key: Key code or character
+        :return: Returned values of called events
+        """
+        if isinstance(key, str):
+            key = ord(key)
+        sequence = self._pending + (key, )
+        if any(keymap.is_prefix(sequence) for keymap in self._active_keymaps()):
+            self._pending = sequence
+            return [True]
+        self._pending = ()
+        events = self._lookup(sequence)
+        if events or len(sequence) == 1:
+            return self._call_events(events, key)
+        end = len(sequence) - 1
+        while end > 1 and not self._lookup(sequence[:end]):
+            end -= 1
+        return_list = self._call_events(self._lookup(sequence[:end]), sequence[end - 1])
+        for key in sequence[end:]:
+            return_list.extend(self.key_pressed(key))
+        return return_list
+
+    def _call_events(self, events: List[KeyboardEvent], key: int) -> List[Any]:
+        """
+        Calls events of active mode whose rule matches key, events bound to key are followed by events matched by rule only
+
+        :param events: Events bound to key or key sequence ending with key
+        :param key: Last pressed key
+        :return: Returned values of called events
+        """
         return_list: List[Any] = []
-        for event in self.keyboard_events:
-            if event.rule(key):
-                logger.keyboard(f"CLASS <{self.parent.__class__.__name__}> (tag={self.parent.tag}) CALLS KEYBOARD EVENT <{event.function.__name__}> (agrs=None, kwargs=None)")
-                return_list.append(event.function(key))
+        logging_enabled = logger.isEnabledFor(KEYBOARD)
+        for event in events + self.keyboard_events:
+            if (event.mode is None or event.mode == self.mode) and event.rule(key):
+                if logging_enabled:
+                    logger.keyboard(f"CLASS <{self.parent.__class__.__name__}> (tag={self.parent.tag}) CALLS KEYBOARD EVENT <{event.function.__name__}> (agrs=None, kwargs=None)")
+                if profiler.enabled:
+                    return_list.append(profiler.measure(self.parent, f"key:{event.function.__name__}", event.function, key))
+                else:
+                    return_list.append(event.function(key))
         return return_list
 
 
-class FlagsController(dict):
+class FlagsController:
+    """
+    Gives access to element flags by name, flags are stored as bits of element flag_bits
+    """
+    __slots__ = ("parent", )
+
     def __init__(self, parent: BaseElementInterface):
-        super().__init__()
         self.parent: BaseElementInterface = parent or BaseElementInterface
 
     def set_flag(self, key: str, value: Any) -> None:
@@ -35,11 +200,12 @@ class FlagsController(dict):
     def get_flag(self, key: str) -> bool:
         return self.__getattr__(key)
 
-    def __getattr__(self, key) -> bool:
-        flag = self.get(key, None)
-        if flag is None:
+    def __getattr__(self, key) -> Optional[bool]:
+        bit = flag_registry.get(key, None)
+        if bit is None:
             logger.warning(f"CLASS FLAG <{self.parent.__class__.__name__}> (tag={self.parent.tag}) <{key}> WAS NOT CREATED!")
-        return flag
+            return None
+        return self.parent.flag_bits & bit != 0
 
     def __setattr__(self, key: str, value: bool) -> None:
         if key in ["flags", "parent"]:
@@ -47,50 +213,103 @@ class FlagsController(dict):
         else:
             if not isinstance(value, bool):
                 raise TypeError(f"Expected type 'bool', got '{type(value)}' instead")
-            self[key] = value
+            bit = register_flag(key)
+            flag_bits = self.parent.flag_bits
+            if (flag_bits & bit != 0) == value:
+                return
+            self.parent.flag_bits = flag_bits | bit if value else flag_bits & ~bit
+            on_flags_changed = getattr(self.parent, "on_flags_changed", None)
+            if on_flags_changed is not None:
+                on_flags_changed(bit)
+
+
+class EventSet:
+    """
+    Responsible for creating events
+    """
+    __slots__ = ("cls", )
+
+    def __init__(self, cls: 'EventManager'):
+        """
+        :param cls: EventManager instance reference
+        """
+        self.cls = cls
+
+    def __getattr__(self, event_name: str):
+        """
+        Creates an event by argument name
+
+        :param event_name: Event argument name
+        """
+        return self.cls.__newattr__(event_name)
 
 
 class EventManager:
     """
-    Manages creation and calling of events
+    Manages creation and calling of events.
+    Events listed in default_events of parent class are bound to parent methods without per-instance objects,
+    EventUnit is allocated only for events set on instance.
     """
+    __slots__ = ("parent", "units")
+
     def __init__(self, parent: object):
         """
         :param parent: Parent class object
         """
-        class Set:
-            """
-            Responsible for creating events
-            """
-            def __init__(self, cls: EventManager):
-                """
-                :param cls: EventManager instance reference
-                """
-                self.cls = cls
-
-            def __getattr__(self, event_name: str):
-                """
-                Creates an event by argument name
-
-                :param event_name: Event argument name
-                """
-                return self.cls.call.__newattr__(event_name)
-
-        class Call:
-            """
-            Responsible for calling events
-            """
-            def __newattr__(self, event_name: str):
-                """
-                Creates an EventUnit object for the specified event argument name
-
-                :param event_name: Event argument name
-                """
-                setattr(self, event_name, EventUnit(event_name, parent))
-                return getattr(self, event_name).__setfunc__
-
-        self.set = Set(self)
-        self.call = Call()
+        self.parent: object = parent
+        self.units: Optional[Dict[str, EventUnit]] = None
+        """Events set on instance by name"""
+
+    @property
+    def set(self) -> EventSet:
+        """
+        Responsible for creating events
+        """
+        return EventSet(self)
+
+    @property
+    def call(self) -> Self:
+        """
+        Responsible for calling events
+        """
+        return self
+
+    def __newattr__(self, event_name: str):
+        """
+        Creates an EventUnit object for the specified event argument name
+
+        :param event_name: Event argument name
+        """
+        if self.units is None:
+            self.units = {}
+        unit = self.units[event_name] = EventUnit(event_name, self.parent)
+        return unit.__setfunc__
+
+    def __getattr__(self, event_name: str):
+        """
+        Returns event set on instance or parent method bound to class default event.
+        Bound to __direct_getattr__ or __unit_getattr__ depending on EVENT logging level and profiler state.
+        """
+        return self.__direct_getattr__(event_name)
+
+    def __direct_getattr__(self, event_name: str):
+        units = self.units
+        if units is not None and event_name in units:
+            return units[event_name]
+        method_name = getattr(self.parent, "default_events", {}).get(event_name, None)
+        if method_name is None:
+            raise AttributeError(f"Event <{event_name}> of class <{self.parent.__class__.__name__}> was not set")
+        return getattr(self.parent, method_name)
+
+    def __unit_getattr__(self, event_name: str):
+        """
+        Wraps class default events into EventUnit, so their calls are logged and profiled
+        """
+        units = self.units
+        if units is not None and event_name in units:
+            return units[event_name]
+        function = EventManager.__direct_getattr__(self, event_name)
+        return EventUnit(event_name, self.parent, function)
 
     @overload
     def set_events(self, event_name: str, function: Callable): ...
@@ -109,7 +328,19 @@ class EventManager:
         else:
             events = kwargs
         for event_name, function in events.items():
-            self.call.__newattr__(event_name)(function)
+            self.__newattr__(event_name)(function)
+
+    def reset_events(self, *event_names: str) -> None:
+        """
+        Removes events set on instance, so class default events are used again
+
+        :param event_names: Event names
+        """
+        if self.units is not None:
+            for event_name in event_names:
+                self.units.pop(event_name, None)
+            if not self.units:
+                self.units = None
 
     @overload
     def call_events(self, event_name: str) -> Any: ...
@@ -119,14 +350,38 @@ class EventManager:
     def call_events(self, *args, **kwargs) -> List[Any]:
         return_list = []
         for event_name in args:
-            return self.call.__getattribute__(event_name)
+            return getattr(self, event_name)
         return return_list
 
+
+@add_instrumentation_hook
+def _bind_event_manager_getattr() -> None:
+    if profiler.enabled or logger.isEnabledFor(EVENT):
+        EventManager.__getattr__ = EventManager.__unit_getattr__
+    else:
+        EventManager.__getattr__ = EventManager.__direct_getattr__
+
+
 class CursorController:
-    def __init__(self, collection, position: int = 0, style: str = "> %(widget)s"):
+    def __init__(self, collection, position: int = 0, style: str = "> %(widget)s", parent: BaseElementInterface = None):
+        """
+        :param parent: Layout invalidated when cursor style changes
+        """
         self.collection: Collection = collection
         self.__position: int = position
-        self.style: str = style
+        self.__style: str = style
+        self.parent: Optional[BaseElementInterface] = parent
+
+    @property
+    def style(self) -> str:
+        return self.__style
+
+    @style.setter
+    def style(self, style: str):
+        if style != self.__style:
+            self.__style = style
+            if self.parent is not None:
+                self.parent.invalidate()
 
     @property
     def current(self) -> BaseElementInterface:
@@ -149,14 +404,116 @@ class CursorController:
         if len(self.collection) > position >= 0:
             return self.collection[position]
 
-    def move(self, step: int, rule: Callable[[BaseElementInterface], bool]):
+    def move(self, step: int, rule: Union[Callable[[BaseElementInterface], bool], int]):
+        """
+        Moves cursor to next element that satisfies rule
+
+        :param step: Direction and first step, following elements are checked one by one
+        :param rule: Condition function or mask of flags that must be set
+        :return: New cursor position or None if there is no such element
+        """
+        mask = rule if isinstance(rule, int) else None
+        direction = 1 if step > 0 else -1
         while True:
             current = self.get_element_by_position(self.__position + step)
             if current:
-                if rule(current):
+                if (current.flag_bits & mask == mask) if mask is not None else rule(current):
                     self.__position += step
                     return self.__position
                 else:
-                    step += step
+                    step += direction
             else:
                 return None
+
+
+class FocusIndex:
+    """
+    Represents depth-first order of focusable leaves of layout tree.
+    Built once for tree state, gives next and previous leaf, leaves by tag and cursor path to any leaf without probing.
+    """
+    def __init__(self, layout: BaseElementInterface, mask: int):
+        """
+        :param layout: Top layout of indexed tree
+        :param mask: Flags that must be set on focusable elements and layouts that contain them
+        """
+        self.layout: BaseElementInterface = layout
+        self.mask: int = mask
+        self.elements: List[BaseElementInterface] = []
+        """Focusable leaves in focus order"""
+        self.tags: Dict[str, List[int]] = {}
+        """Indexes of focusable leaves by tag"""
+        self._order: Dict[BaseElementInterface, int] = {}
+        """Count of focusable leaves before every walked element"""
+        self._links: Dict[BaseElementInterface, Tuple[BaseElementInterface, int]] = {}
+        """Layout and position in it of every walked element"""
+        self._walk(layout)
+
+    def _walk(self, layout: BaseElementInterface) -> None:
+        mask, order, links = self.mask, self._order, self._links
+        for position, element in enumerate(layout.elements):
+            order[element] = len(self.elements)
+            links[element] = (layout, position)
+            if element.flag_bits & mask != mask:
+                continue
+            if getattr(element, "elements", None) is not None:
+                self._walk(element)
+            else:
+                self.tags.setdefault(element.tag, []).append(len(self.elements))
+                self.elements.append(element)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __contains__(self, element: BaseElementInterface) -> bool:
+        """
+        Checks whether element was walked, including not focusable elements
+        """
+        return element in self._order
+
+    def index_of(self, element: BaseElementInterface) -> Optional[int]:
+        """
+        Returns focus order index of element, None if element is not focusable leaf of tree
+        """
+        index = self._order.get(element, None)
+        if index is not None and index < len(self.elements) and self.elements[index] is element:
+            return index
+        return None
+
+    def get_next_index(self, element: BaseElementInterface, step: int = 1) -> Optional[int]:
+        """
+        Returns index of leaf step leaves after element, element may be not focusable
+
+        :param element: Element of indexed tree
+        :param step: Count of leaves, negative to move backward
+        :return: Leaf index or None if it is out of tree or element is not in tree
+        """
+        index = self._order.get(element, None)
+        if index is None:
+            return None
+        if self.index_of(element) is None and step > 0:
+            # index of element that is not focusable points to the following leaf
+            step -= 1
+        index += step
+        return index if 0 <= index < len(self.elements) else None
+
+    def get_indexes_by_tag(self, tag: str) -> List[int]:
+        """
+        Returns indexes of focusable leaves with given tag
+        """
+        return self.tags.get(tag, [])
+
+    def get_path(self, index: int) -> List[Tuple[BaseElementInterface, int]]:
+        """
+        Returns cursor positions that lead from top layout to leaf
+
+        :param index: Leaf index
+        :return: Pairs of layout and position in it, starting from top layout
+        """
+        path = []
+        element = self.elements[index]
+        while element is not self.layout:
+            layout, position = self._links[element]
+            path.append((layout, position))
+            element = layout
+        path.reverse()
+        return path
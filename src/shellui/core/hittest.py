@@ -0,0 +1,141 @@
+from ..common.types import List, Tuple, Dict, Any, Optional, Iterable
+from bisect import bisect_left, bisect_right
+
+
+Rectangle = Tuple[int, int, int, int, Any]
+"""Rectangle in (top, left, bottom, right, element) format, bottom and right are exclusive"""
+
+
+class HitIndex:
+    """
+    Finds element drawn at screen cell. Rectangles are kept in layers, one layer for draw plan and one for every region,
+    so when plan or region is compiled again only its layer is replaced. Rectangles of layer are given in drawing order
+    and are split into rows once per layer change. Later rectangles and higher layers cover earlier ones.
+    Row is indexed on first hit test in it as sorted disjoint intervals owned by topmost elements,
+    so hit test in indexed row is binary search. Replacing layer drops indexed rows covered by its old and new rectangles only.
+    """
+    def __init__(self, height: int):
+        """
+        :param height: Count of screen rows, rectangle parts outside of screen are not indexed
+        """
+        self.height: int = height
+        self.layers: Dict[Any, List[Rectangle]] = {}
+        """Rectangles of layers by layer key"""
+        self.order: List[Any] = []
+        """Layer keys from the bottom layer to the top one"""
+        self._layer_rows: Dict[Any, Dict[int, List[Rectangle]]] = {}
+        """Rectangles of layers by row, layers whose rectangles were replaced are split again on first hit test"""
+        self._rows: Dict[int, Tuple[List[int], List[int], List[Any]]] = {}
+        """Starts, ends and elements of intervals of indexed rows"""
+
+    def set_layer(self, key: Any, rectangles: List[Rectangle]) -> None:
+        """
+        Replaces rectangles of layer, new layer is placed over all layers
+
+        :param key: Layer key
+        :param rectangles: Rectangles in drawing order
+        """
+        old = self.layers.get(key, None)
+        if old == rectangles:
+            return
+        if old is None:
+            self.order.append(key)
+        self.layers[key] = rectangles
+        self._layer_rows.pop(key, None)
+        self._drop_rows(old or ())
+        self._drop_rows(rectangles)
+
+    def remove_layer(self, key: Any) -> None:
+        """
+        Removes layer and its rectangles
+
+        :param key: Layer key
+        """
+        old = self.layers.pop(key, None)
+        if old is not None:
+            self.order.remove(key)
+            self._layer_rows.pop(key, None)
+            self._drop_rows(old)
+
+    def set_order(self, order: List[Any]) -> None:
+        """
+        Sets drawing order of layers, indexed rows are dropped if order changed
+
+        :param order: Layer keys from the bottom layer to the top one
+        """
+        order = [key for key in order if key in self.layers]
+        if order != self.order:
+            self.order = order
+            self._rows.clear()
+
+    def _drop_rows(self, rectangles: Iterable[Rectangle]) -> None:
+        rows = self._rows
+        if not rows:
+            return
+        for top, _, bottom, _, _ in rectangles:
+            for y in range(max(top, 0), min(bottom, self.height)):
+                rows.pop(y, None)
+
+    def _get_layer_rows(self, key: Any) -> Dict[int, List[Rectangle]]:
+        layer_rows = self._layer_rows.get(key, None)
+        if layer_rows is None:
+            layer_rows = self._layer_rows[key] = {}
+            for rectangle in self.layers[key]:
+                top, left, bottom, right, _ = rectangle
+                if left < right:
+                    for y in range(max(top, 0), min(bottom, self.height)):
+                        layer_rows.setdefault(y, []).append(rectangle)
+        return layer_rows
+
+    def get_row(self, y: int) -> Tuple[List[int], List[int], List[Any]]:
+        """
+        Returns intervals of row, indexes row if it was not indexed yet
+
+        :param y: Row
+        :return: Starts, ends and elements of disjoint intervals sorted by start
+        """
+        row = self._rows.get(y, None)
+        if row is None:
+            starts: List[int] = []
+            ends: List[int] = []
+            elements: List[Any] = []
+            for key in self.order:
+                for _, left, _, right, element in self._get_layer_rows(key).get(y, ()):
+                    self._paint(starts, ends, elements, left, right, element)
+            row = self._rows[y] = (starts, ends, elements)
+        return row
+
+    @staticmethod
+    def _paint(starts: List[int], ends: List[int], elements: List[Any], left: int, right: int, element: Any) -> None:
+        first = bisect_right(ends, left)
+        last = bisect_left(starts, right)
+        new_starts, new_ends, new_elements = [left], [right], [element]
+        if first < last:
+            # covered intervals are replaced, their parts outside of new interval remain
+            if starts[first] < left:
+                new_starts.insert(0, starts[first])
+                new_ends.insert(0, left)
+                new_elements.insert(0, elements[first])
+            if ends[last - 1] > right:
+                new_starts.append(right)
+                new_ends.append(ends[last - 1])
+                new_elements.append(elements[last - 1])
+        starts[first:last] = new_starts
+        ends[first:last] = new_ends
+        elements[first:last] = new_elements
+
+    def hit(self, y: int, x: int) -> Optional[Any]:
+        """
+        Returns topmost element whose rectangle contains cell
+
+        :param y: Row
+        :param x: Column
+        :return: Element or None if there is no element at cell
+        """
+        if not 0 <= y < self.height:
+            return None
+        starts, ends, elements = self.get_row(y)
+        index = bisect_right(starts, x) - 1
+        if index >= 0 and x < ends[index]:
+            return elements[index]
+        return None
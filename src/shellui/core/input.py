@@ -0,0 +1,117 @@
+from ..common.types import List, Union, Optional, Iterable, FrozenSet, KeyInput, PasteInput
+import curses
+
+
+PASTE_START = (27, 91, 50, 48, 48, 126)
+"""Key codes of "ESC [ 2 0 0 ~" sent by terminal before pasted text"""
+PASTE_END = (27, 91, 50, 48, 49, 126)
+"""Key codes of "ESC [ 2 0 1 ~" sent by terminal after pasted text"""
+NAVIGATION_KEYS: FrozenSet[int] = frozenset((curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT,
+                                             curses.KEY_PPAGE, curses.KEY_NPAGE, curses.KEY_BTAB, 9))
+"""Keys whose repeated presses are moving focus"""
+COALESCED_KEYS: FrozenSet[int] = NAVIGATION_KEYS | {curses.KEY_RESIZE}
+"""Keys whose repeated presses are merged by InputDecoder"""
+
+
+class InputDecoder:
+    """
+    Turns batches of key codes into input events: repeated navigation and resize keys are merged into one KeyInput,
+    text between bracketed paste markers becomes one PasteInput. Paste and its markers may be split between batches,
+    batch that ends with beginning of PASTE_START keeps it until the next batch or flush.
+    """
+    def __init__(self, coalesced_keys: Iterable[int] = COALESCED_KEYS):
+        """
+        :param coalesced_keys: Keys whose repeated presses are merged
+        """
+        self.coalesced_keys: FrozenSet[int] = frozenset(coalesced_keys)
+        self._paste: Optional[List[int]] = None
+        """Key codes of unfinished paste"""
+        self._prefix: List[int] = []
+        """Key codes at the end of the last batch that may begin PASTE_START"""
+
+    @property
+    def pasting(self) -> bool:
+        """
+        Whether the last batch ended inside pasted text
+        """
+        return self._paste is not None
+
+    @property
+    def pending(self) -> bool:
+        """
+        Whether the last batch ended with beginning of PASTE_START that is kept until the next batch
+        """
+        return bool(self._prefix)
+
+    def flush(self) -> List[KeyInput]:
+        """
+        Returns kept beginning of PASTE_START as keys, called when the rest of marker did not come in time
+
+        :return: Key events of kept key codes
+        """
+        prefix, self._prefix = self._prefix, []
+        return [KeyInput(key) for key in prefix]
+
+    def feed(self, keys: Iterable[int]) -> List[Union[KeyInput, PasteInput]]:
+        """
+        Decodes batch of key codes
+
+        :param keys: Key codes in order they were read
+        :return: Input events in the same order
+        """
+        keys = self._prefix + list(keys)
+        self._prefix = []
+        return_list: List[Union[KeyInput, PasteInput]] = []
+        index, length = 0, len(keys)
+        while index < length:
+            if self._paste is not None:
+                # end marker may be split between batches
+                start = max(len(self._paste) - len(PASTE_END) + 1, 0)
+                self._paste.extend(keys[index:])
+                end = self._find(self._paste, PASTE_END, start)
+                if end is None:
+                    break
+                keys = self._paste[end + len(PASTE_END):]
+                return_list.append(PasteInput(self.decode_text(self._paste[:end])))
+                self._paste = None
+                index, length = 0, len(keys)
+                continue
+            key = keys[index]
+            if key == PASTE_START[0]:
+                sequence = tuple(keys[index:index + len(PASTE_START)])
+                if sequence == PASTE_START:
+                    self._paste = []
+                    index += len(PASTE_START)
+                    continue
+                if index + len(sequence) == length and sequence == PASTE_START[:len(sequence)]:
+                    # start marker may be split between batches
+                    self._prefix = keys[index:]
+                    break
+            last = return_list[-1] if return_list else None
+            if key in self.coalesced_keys and isinstance(last, KeyInput) and last.key == key:
+                last.count += 1
+            else:
+                return_list.append(KeyInput(key))
+            index += 1
+        return return_list
+
+    @staticmethod
+    def _find(keys: List[int], sequence: tuple, start: int) -> Optional[int]:
+        first, length = sequence[0], len(sequence)
+        for index in range(start, len(keys) - length + 1):
+            if keys[index] == first and tuple(keys[index:index + length]) == sequence:
+                return index
+        return None
+
+    @staticmethod
+    def decode_text(keys: List[int]) -> str:
+        """
+        Joins key codes of pasted text, byte codes are decoded as UTF-8
+
+        :param keys: Key codes
+        :return: Text
+        """
+        try:
+            return bytes(keys).decode("utf-8", "replace")
+        except ValueError:
+            return "".join(map(chr, keys))
@@ -0,0 +1,187 @@
+from ..common.types import Callable, Any, Optional, Set, List, Tuple
+import asyncio
+import inspect
+import time
+
+
+class FrameScheduler:
+    """
+    Coalesces any number of redraw requests into at most one frame per frame interval
+    """
+    def __init__(self, frame: Callable[[], Any], fps: float = 30):
+        """
+        :param frame: Function that updates, builds and draws interface
+        :param fps: Maximum count of frames per second
+        """
+        self.frame: Callable[[], Any] = frame
+        self.fps: float = fps
+        self.frames: int = 0
+        """Count of drawn frames"""
+        self.requests: int = 0
+        """Count of redraw requests"""
+        self._requested: bool = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_frame: float = 0
+
+    @property
+    def frame_interval(self) -> float:
+        return 1 / self.fps if self.fps else 0
+
+    def request(self) -> None:
+        """
+        Requests frame, does nothing if frame is already requested
+        """
+        self.requests += 1
+        if not self._requested:
+            self._requested = True
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def run(self) -> None:
+        """
+        Draws requested frames until cancelled
+        """
+        self._wakeup = asyncio.Event()
+        if self._requested:
+            self._wakeup.set()
+        try:
+            while True:
+                await self._wakeup.wait()
+                delay = self._last_frame + self.frame_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._wakeup.clear()
+                self._requested = False
+                self._last_frame = time.monotonic()
+                self.frame()
+                self.frames += 1
+        finally:
+            self._wakeup = None
+
+
+class Timers:
+    """
+    Runs delayed and repeated callbacks in event loop, callbacks may return awaitable objects.
+    Callbacks scheduled while no event loop is running are kept until start is called in running loop
+    """
+    def __init__(self, on_error: Callable[[BaseException], Any] = None):
+        """
+        :param on_error: Function that takes exception raised by callback
+        """
+        self.on_error: Optional[Callable[[BaseException], Any]] = on_error
+        self._handles: Set[Any] = set()
+        self._pending: List[Tuple[Callable, tuple]] = []
+        """Scheduling methods and their arguments called before event loop was running"""
+
+    def _defer(self, method: Callable, *args) -> bool:
+        """
+        Keeps scheduling call until start if no event loop is running
+
+        :return: Whether call was deferred
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._pending.append((method, args))
+            return True
+        return False
+
+    def start(self) -> None:
+        """
+        Schedules callbacks kept while no event loop was running, must be called in running event loop.
+        Delays of kept callbacks are counted from this call
+        """
+        pending, self._pending = self._pending, []
+        for method, args in pending:
+            method(*args)
+
+    def _invoke(self, callback: Callable, *args) -> None:
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                task.add_done_callback(self._check_task)
+                self._handles.add(task)
+        except Exception as exception:
+            self._fail(exception)
+
+    def _check_task(self, task: asyncio.Future) -> None:
+        self._handles.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._fail(task.exception())
+
+    def _fail(self, exception: BaseException) -> None:
+        if self.on_error is None:
+            raise exception
+        self.on_error(exception)
+
+    def call_soon(self, callback: Callable, *args) -> Optional[asyncio.Handle]:
+        """
+        Calls callback once in next event loop iteration
+
+        :param callback: Function or coroutine function
+        :return: Handle that can be cancelled, None if event loop is not running yet
+        """
+        if self._defer(self.call_soon, callback, *args):
+            return None
+
+        def run():
+            self._handles.discard(handle)
+            self._invoke(callback, *args)
+
+        handle = asyncio.get_running_loop().call_soon(run)
+        self._handles.add(handle)
+        return handle
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Optional[asyncio.TimerHandle]:
+        """
+        Calls callback once after delay
+
+        :param delay: Delay in seconds
+        :param callback: Function or coroutine function
+        :return: Handle that can be cancelled, None if event loop is not running yet
+        """
+        if self._defer(self.call_later, delay, callback, *args):
+            return None
+
+        def run():
+            self._handles.discard(handle)
+            self._invoke(callback, *args)
+
+        handle = asyncio.get_running_loop().call_later(delay, run)
+        self._handles.add(handle)
+        return handle
+
+    def call_every(self, interval: float, callback: Callable, *args) -> Optional[asyncio.Task]:
+        """
+        Calls callback every interval, next call waits for awaitable returned by previous one
+
+        :param interval: Interval in seconds
+        :param callback: Function or coroutine function
+        :return: Task that can be cancelled, None if event loop is not running yet
+        """
+        if self._defer(self.call_every, interval, callback, *args):
+            return None
+
+        async def repeat():
+            next_call = time.monotonic()
+            while True:
+                next_call += interval
+                await asyncio.sleep(max(next_call - time.monotonic(), 0))
+                try:
+                    result = callback(*args)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as exception:
+                    self._fail(exception)
+
+        task = asyncio.ensure_future(repeat())
+        task.add_done_callback(self._check_task)
+        self._handles.add(task)
+        return task
+
+    def cancel_all(self) -> None:
+        for handle in list(self._handles):
+            handle.cancel()
+        self._handles.clear()
+        self._pending.clear()
@@ -0,0 +1,70 @@
+from ..common.types import List, Tuple, Optional, Any, Buffer
+from .frame import Frame
+
+
+class Region:
+    """
+    Represents rectangle of screen drawn from subtree of one element into its own frame.
+    Region is compiled and composed again only when its subtree changes, regions with higher z cover lower ones.
+    """
+    __slots__ = ("element", "z", "order", "y", "x", "frame", "plan", "plan_key", "children", "rectangles", "changed")
+
+    def __init__(self, element: Any, z: int = 0):
+        """
+        :param element: Element whose buffer is drawn into region
+        :param z: Regions with higher z are drawn over regions with lower z
+        """
+        self.element: Any = element
+        self.z: int = z
+        self.order: int = 0
+        """Position of region buffer in buffer tree, orders regions with the same z"""
+        self.y: int = 0
+        self.x: int = 0
+        self.frame: Optional[Frame] = None
+        """Cells of region, its size is size of element buffer cut by screen"""
+        self.plan: List[Tuple[int, int, str, int]] = []
+        """Draw operations relative to region origin"""
+        self.plan_key: Optional[Tuple[Any, int]] = None
+        self.children: List[Tuple[Buffer, int, int]] = []
+        """Buffers of nested regions with their positions relative to region origin"""
+        self.rectangles: List[Tuple[int, int, int, int, Any]] = []
+        """Rectangles of elements drawn by plan, relative to region origin"""
+        self.changed: bool = True
+        """Whether frame was redrawn since region was composed last time"""
+
+    def place(self, y: int, x: int, width: int, height: int) -> bool:
+        """
+        Moves and resizes region, frame is created again if size changed.
+        Plan is compiled again because visible part of region may change
+
+        :return: Whether position or size changed
+        """
+        width, height = max(width, 0), max(height, 0)
+        if self.frame is not None and (self.y, self.x, self.frame.width, self.frame.height) == (y, x, width, height):
+            return False
+        self.y, self.x = y, x
+        self.plan_key = None
+        if self.frame is None or (self.frame.width, self.frame.height) != (width, height):
+            self.frame = Frame(width, height)
+            self.changed = True
+        return True
+
+    def redraw(self, plan: List[Tuple[int, int, str, int]]) -> None:
+        """
+        Draws plan into region frame if it differs from the drawn one
+        """
+        if plan == self.plan and not self.changed:
+            return
+        self.plan = plan
+        frame = self.frame
+        frame.clear()
+        for y, x, text, attr in plan:
+            frame.put(y, x, text, attr)
+        self.changed = True
+
+    def get_rows(self) -> range:
+        return range(self.y, self.y + self.frame.height)
+
+    def intersects(self, other: 'Region') -> bool:
+        return self.x < other.x + other.frame.width and other.x < self.x + self.frame.width and \
+            self.y < other.y + other.frame.height and other.y < self.y + self.frame.height
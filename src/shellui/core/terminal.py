@@ -1,18 +1,42 @@
-from ..common.types import List, Union, Buffer, Position
+from ..common.types import List, Union, Buffer, FrameStats, Tuple, Optional, Any, Dict, Set, Size, MouseInput
 from ..common.debug import logger
-import curses
+from ..common.text import text_width
+from .frame import Frame
+from .region import Region
+from .hittest import HitIndex, Rectangle
+from .backend import TerminalBackend, CursesBackend
+import sys
 
 
 class Terminal:
     """
     Manages interface for working with text-based user interface.
     """
-    def __init__(self):
+    def __init__(self, backend: TerminalBackend = None):
+        """
+        :param backend: Screen and keyboard device, CursesBackend by default
+        """
         self._buffer: Buffer
-        self.stdscr = curses.initscr()
-        self.stdscr.keypad(True)
-        curses.noecho()
-        curses.curs_set(0)
+        self.backend: TerminalBackend = backend or CursesBackend()
+        self.backend.start()
+        width, height = self.backend.get_size()
+        self._front: Frame = Frame(width, height)
+        self._back: Frame = Frame(width, height)
+        self.stats: FrameStats = FrameStats()
+        """Counters of cells written to the screen"""
+        self._plan: List[Tuple[int, int, str, int]] = []
+        self._plan_key: Optional[Tuple[Any, int]] = None
+        self._plan_drawn: bool = False
+        self._blocking: bool = True
+        self.regions: Dict[Any, int] = {}
+        """Z order of elements drawn as separate regions"""
+        self._regions: Dict[Any, Region] = {}
+        self._region_order: List[Region] = []
+        """Placed regions from the bottom one to the top one"""
+        self._region_buffers: List[Tuple[Buffer, int, int]] = []
+        """Region buffers found in rendering buffer tree"""
+        self._hit_index: HitIndex = HitIndex(height)
+        """Rectangles of elements drawn by plan and regions, layer of plan has key None"""
 
     def set_buffer(self, buffer: Buffer) -> None:
         """
@@ -24,26 +48,303 @@ class Terminal:
         """
         self._buffer = buffer
 
-    def draw(self) -> None:
+    @property
+    def size(self) -> Size:
+        """
+        Screen size in cells
+        """
+        return Size(self._back.width, self._back.height)
+
+    def resize(self) -> bool:
+        """
+        Reads new screen size after terminal was resized, reallocates frames and redraws whole screen on the next draw.
+
+        :return: Whether screen size changed
+        :rtype: bool
+        """
+        old_size = self.size
+        width, height = self.backend.resize()
+        # backend cleared screen, so every cell is written again
+        self._front = Frame(width, height)
+        self._back = Frame(width, height)
+        self._regions = {}
+        self._region_order = []
+        self._hit_index = HitIndex(height)
+        self.invalidate_plan()
+        return self.size != old_size
+
+    def add_region(self, element: Any, z: int = 0) -> None:
+        """
+        Draws buffer of element as separate region. Region is compiled and composed again only when its subtree changes,
+        so changes outside of it do not redraw it. Regions with higher z cover regions with lower z and the rest of the screen.
+
+        :param element: Element whose buffer is drawn into region, its contents are cut by its size
+        :type element: Any
+        :param z: Order of overlapping regions
+        :type z: int
+        :rtype: None
+        """
+        self.regions[element] = z
+        self.invalidate_plan()
+
+    def remove_region(self, element: Any) -> None:
+        """
+        Draws buffer of element as part of its parent again.
+
+        :param element: Element added by add_region
+        :type element: Any
+        :rtype: None
+        """
+        if self.regions.pop(element, None) is not None:
+            self.invalidate_plan()
+
+    def invalidate_plan(self) -> None:
         """
-        Clears screen and draws buffer contents to the screen.
+        Forces draw plan to be compiled again on the next draw,
+        needed when buffer contents were changed without changing version of element that built it.
 
         :rtype: None
         """
-        self.stdscr.clear()
+        self._plan_key = None
+        self._plan_drawn = False
+        for region in self._regions.values():
+            region.plan_key = None
+            region.changed = True
 
-        def _recursive_buffer_iteration(buffer: Buffer) -> list:
+    def get_plan(self) -> List[Tuple[int, int, str, int]]:
+        """
+        Returns draw plan of rendering buffer, compiles it only if element that built buffer has changed.
+        Plan that contains widgets whose render is not memoized is compiled on every draw.
+        Plan does not contain contents of regions.
+
+        :return: Draw operations in (y, x, text, attr) format
+        :rtype: typing.List[typing.Tuple[int, int, str, int]]
+        """
+        element = self._buffer.element
+        key = (element, element.version) if element is not None else None
+        if key is None or key != self._plan_key:
+            region_buffers: List[Tuple[Buffer, int, int]] = []
+            rectangles: List[Rectangle] = []
+            volatile: List[Buffer] = []
+            plan = self.compile_plan(self._buffer, self.regions, region_buffers, clip=(0, 0, self._back.height, self._back.width),
+                                     rectangles=rectangles, volatile=volatile)
+            self._hit_index.set_layer(None, rectangles)
+            if plan != self._plan:
+                self._plan = plan
+                self._plan_drawn = False
+            self._plan_key = None if volatile else key
+            self._region_buffers = region_buffers
+        return self._plan
+
+    @staticmethod
+    def compile_plan(buffer: Buffer, regions: Dict[Any, int] = None, region_buffers: List[Tuple[Buffer, int, int]] = None,
+                     origin: Tuple[int, int] = (0, 0), clip: Tuple[int, int, int, int] = None,
+                     rectangles: List[Rectangle] = None, volatile: List[Buffer] = None) -> List[Tuple[int, int, str, int]]:
+        """
+        Walks buffer tree once and flattens it into list of single line draw operations with absolute positions.
+        Buffers whose rectangle is outside clip rectangle are skipped together with their subtree without rendering them,
+        lines outside it are dropped.
+
+        :param buffer: Buffer to compile
+        :type buffer: Buffer
+        :param regions: Elements whose buffers are not flattened, except the compiled buffer itself
+        :type regions: typing.Dict[Any, int]
+        :param region_buffers: List that receives skipped region buffers with their positions
+        :type region_buffers: typing.List[typing.Tuple[Buffer, int, int]]
+        :param origin: Position of parent of compiled buffer in (y, x) format
+        :type origin: typing.Tuple[int, int]
+        :param clip: Visible rectangle in (top, left, bottom, right) format, bottom and right are exclusive
+        :type clip: typing.Tuple[int, int, int, int]
+        :param rectangles: List that receives rectangles of compiled buffers of elements in drawing order
+        :type rectangles: typing.List[Rectangle]
+        :param volatile: List that receives rendered buffers whose output may change without changing element version
+        :type volatile: typing.List[Buffer]
+        :return: Draw operations in (y, x, text, attr) format
+        :rtype: typing.List[typing.Tuple[int, int, str, int]]
+        """
+        plan = []
+        root = buffer
+        top, left, bottom, right = clip or (-sys.maxsize, -sys.maxsize, sys.maxsize, sys.maxsize)
+        stack = [(buffer, *origin)]
+        while stack:
+            buffer, origin_y, origin_x = stack.pop()
+            y, x = origin_y + buffer.position.y, origin_x + buffer.position.x
+            size = buffer.size
+            # empty size is treated as unknown, widgets that do not measure themselves are still drawn
+            if y >= bottom or x >= right or size is not None and size.height > 0 and size.width > 0 and \
+                    (y + size.height <= top or x + size.width <= left):
+                continue
+            if regions and buffer is not root and buffer.element in regions:
+                region_buffers.append((buffer, y, x))
+                continue
+            if rectangles is not None and size is not None and buffer.element is not None:
+                rectangles.append((y, x, y + size.height, x + size.width, buffer.element))
+            if volatile is not None and (buffer.element is None or not buffer.element.render_memoized):
+                volatile.append(buffer)
             method_return: Union[str, List[Buffer]] = buffer.function()
             if isinstance(method_return, list):
-                for _bottom_buffer in method_return:
-                    _bottom_buffer.position = Position(*[a + b for a, b in zip(_bottom_buffer.position, buffer.position)])
-                    yield from _recursive_buffer_iteration(_bottom_buffer)
-            else:
-                yield [buffer.position.y, buffer.position.x, method_return]
+                stack.extend((bottom_buffer, y, x) for bottom_buffer in reversed(method_return))
+            elif method_return:
+                attr = buffer.attr
+                lines = method_return.split("\n")
+                for line_number in range(max(top - y, 0), min(bottom - y, len(lines))):
+                    line = lines[line_number]
+                    if line:
+                        plan.append((y + line_number, x, line, attr))
+        return plan
+
+    def update_regions(self) -> bool:
+        """
+        Places regions found in buffer tree and redraws frames of regions whose elements have changed.
+        Region frames have size of element buffers cut by screen.
 
-        for string_args in _recursive_buffer_iteration(self._buffer):
-            self.stdscr.addstr(*string_args)
-        self.stdscr.refresh()
+        :return: Whether regions were added, removed, moved or resized
+        :rtype: bool
+        """
+        regions: Dict[Any, Region] = {}
+        moved = False
+        found = list(self._region_buffers)
+        for order, (buffer, y, x) in enumerate(found):
+            element = buffer.element
+            if element in regions:
+                continue
+            region = self._regions.get(element, None)
+            if region is None:
+                region = Region(element)
+                moved = True
+            # frame is cut by screen, so it shrinks and grows with terminal
+            moved |= region.place(y, x, min(buffer.size.width, self._back.width - x), min(buffer.size.height, self._back.height - y))
+            moved |= (region.z, region.order) != (self.regions[element], order)
+            region.z, region.order = self.regions[element], order
+            key = (element, element.version)
+            if key != region.plan_key:
+                children: List[Tuple[Buffer, int, int]] = []
+                rectangles: List[Rectangle] = []
+                volatile: List[Buffer] = []
+                clip = (max(-y, 0), max(-x, 0), min(region.frame.height, self._back.height - y), min(region.frame.width, self._back.width - x))
+                region.redraw(self.compile_plan(buffer, self.regions, children, (-buffer.position.y, -buffer.position.x), clip, rectangles,
+                                                volatile))
+                region.plan_key, region.children, region.rectangles = None if volatile else key, children, rectangles
+                self.set_region_hit_layer(region)
+            found.extend((child, y + child_y, x + child_x) for child, child_y, child_x in region.children)
+            regions[element] = region
+        moved |= len(regions) != len(self._regions)
+        for element, region in self._regions.items():
+            if regions.get(element, None) is not region:
+                self._hit_index.remove_layer(region)
+        self._regions = regions
+        if moved:
+            self._region_order = sorted(regions.values(), key=lambda region: (region.z, region.order))
+            self._hit_index.set_order([None, *self._region_order])
+        return moved
+
+    def set_region_hit_layer(self, region: Region) -> None:
+        """
+        Replaces hit index layer of region with rectangles of its elements moved to screen and cut by region.
+
+        :param region: Compiled region
+        :type region: Region
+        :rtype: None
+        """
+        bottom, right = region.y + region.frame.height, region.x + region.frame.width
+        self._hit_index.set_layer(region, [(max(region.y + top, region.y), max(region.x + left, region.x),
+                                            min(region.y + rectangle_bottom, bottom), min(region.x + rectangle_right, right), element)
+                                           for top, left, rectangle_bottom, rectangle_right, element in region.rectangles])
+
+    def hit_test(self, y: int, x: int) -> Optional[Any]:
+        """
+        Returns topmost element drawn at screen cell in the last drawn frame.
+        Hit index keeps rectangles collected while compiling plan and regions, only layers of recompiled ones are replaced
+        and only rows they cover are indexed again on first hit test in them.
+
+        :param y: Row
+        :type y: int
+        :param x: Column
+        :type x: int
+        :return: Element or None if there is no element at cell
+        :rtype: typing.Optional[Any]
+        """
+        return self._hit_index.hit(y, x)
+
+    def set_mouse(self, enabled: bool) -> None:
+        """
+        Enables mouse, clicks and wheel scrolls are read as KEY_MOUSE keys followed by read_mouse call.
+
+        :param enabled: Whether mouse is enabled
+        :type enabled: bool
+        :rtype: None
+        """
+        self.backend.set_mouse(enabled)
+
+    def read_mouse(self) -> Optional[MouseInput]:
+        """
+        Returns mouse event of the last read KEY_MOUSE key.
+
+        :return: Mouse event or None if event could not be read
+        :rtype: typing.Optional[MouseInput]
+        """
+        return self.backend.read_mouse()
+
+    def draw(self) -> None:
+        """
+        Composes draw plan and regions into back frame and writes only cells that differ from the screen.
+        When only regions have changed, only they and regions over them are composed and only their rows are compared.
+        Does nothing if nothing has changed since the last draw.
+
+        :rtype: None
+        """
+        plan = self.get_plan()
+        moved = self.update_regions() if self._region_buffers or self._regions else False
+        changed = [region for region in self._region_order if region.changed]
+        if self._plan_drawn and not moved and not changed:
+            self.stats.cells_written = self.stats.runs_written = 0
+            self.stats.frames += 1
+            return
+
+        back = self._back
+        rows: Optional[Set[int]] = None
+        if self._plan_drawn and not moved:
+            # only changed regions and regions that cover them are composed again
+            rows = set()
+            composed = []
+            for region in self._region_order:
+                if region.changed or any(region.intersects(other) for other in composed):
+                    composed.append(region)
+                    rows.update(row for row in region.get_rows() if 0 <= row < back.height)
+        else:
+            back.clear()
+            put = back.put
+            for y, x, text, attr in plan:
+                put(y, x, text, attr)
+            composed = self._region_order
+        for region in composed:
+            back.blit(region.frame, region.y, region.x)
+            region.changed = False
+
+        runs = back.diff(self._front, None if rows is None else sorted(rows), self.backend.MERGE_GAP)
+        cells_written = 0
+        for y, x, text, attr in runs:
+            self.backend.write(y, x, text, attr)
+            cells_written += text_width(text)
+        self.backend.flush()
+        self._front.copy_rows(back, rows)
+        self._plan_drawn = True
+
+        self.stats.cells_written = cells_written
+        self.stats.runs_written = len(runs)
+        self.stats.frames += 1
+        self.stats.total_cells_written += cells_written
+
+    def set_blocking(self, blocking: bool) -> None:
+        """
+        Sets whether read waits for key or returns -1 if no key was pressed.
+
+        :param blocking: Wait for key
+        :type blocking: bool
+        :rtype: None
+        """
+        self._blocking = blocking
+        self.backend.set_blocking(blocking)
 
     def read(self) -> int:
         """
@@ -52,12 +353,62 @@ class Terminal:
         :return: Key char
         :rtype: int
         """
-        return self.stdscr.getch()
+        return self.backend.read()
+
+    def read_pending(self, limit: int = 4096) -> List[int]:
+        """
+        Reads all keys that were already entered without waiting for new ones.
+
+        :param limit: Maximum count of read keys
+        :type limit: int
+        :return: Key codes in order they were entered
+        :rtype: typing.List[int]
+        """
+        blocking = self._blocking
+        if blocking:
+            self.backend.set_blocking(False)
+        keys: List[int] = []
+        try:
+            while len(keys) < limit:
+                key = self.backend.read()
+                if key == -1:
+                    break
+                keys.append(key)
+        finally:
+            if blocking:
+                self.backend.set_blocking(True)
+        return keys
+
+    def set_bracketed_paste(self, enabled: bool) -> None:
+        """
+        Enables bracketed paste, pasted text is read between PASTE_START and PASTE_END key sequences.
+
+        :param enabled: Whether bracketed paste is enabled
+        :type enabled: bool
+        :rtype: None
+        """
+        self.backend.set_bracketed_paste(enabled)
+
+    def fileno(self) -> Optional[int]:
+        """
+        Returns file descriptor that becomes readable when key is pressed.
+
+        :return: File descriptor or None if backend has no descriptor
+        :rtype: typing.Optional[int]
+        """
+        return self.backend.fileno()
+
+    @property
+    def stdscr(self):
+        """
+        Curses window of CursesBackend
+        """
+        return getattr(self.backend, "stdscr", None)
 
     def close(self):
         """
-        Closes the curses window and restores the terminal to its original state.
+        Closes the backend and restores the terminal to its original state.
 
         :rtype: None
         """
-        curses.endwin()
+        self.backend.close()
@@ -1,13 +1,56 @@
-from ..common.types import Buffer, Position, Size, Collection, ElementState, Tuple, Any, Union, List, overload, runtime_checkable, Protocol, ABC, abstractmethod, Self
-from ..common.debug import logger
-from ..core.handler import EventManager, FlagsController, KeyboardHandler
+from ..common.types import Buffer, Position, Size, Collection, ElementState, Tuple, Any, Union, List, Dict, Optional, overload, runtime_checkable, Protocol, ABC, abstractmethod, Self, register_flag, flags_to_bits, MouseInput
+from ..common.debug import logger, CREATE
+from ..core.handler import EventManager, FlagsController, KeyboardHandler, FocusIndex
+from functools import wraps, partial
+
+
+FLAG_FIXED_SIZE = register_flag("isFixedSize")
+
+
+def memoize_render(render):
+    """
+    Decorator for widget render method that returns cached result until widget version changes.
+    Render of decorated method must depend only on state changed through invalidating setters.
+
+    :param render: Widget render method
+    :return: Caching render method
+    """
+    @wraps(render)
+    def memoized_render(self):
+        memo = self._render_memo
+        if memo is not None and memo[0] == self.version:
+            return memo[1]
+        result = render(self)
+        self._render_memo = (self.version, result)
+        return result
+    memoized_render.memoized = True
+    return memoized_render
 
 
 class BaseElement(ABC):
     """
-    Represents abstract base class for all interface elements and layouts
+    Represents abstract base class for all interface elements and layouts.
+    Events, flags and key bindings have class level defaults, per-instance objects are created only when needed.
     """
+    __slots__ = ("_position", "size", "parent", "_tag", "state", "dirty", "version", "flag_bits", "event", "_flags", "_keyboard")
     class_base_tag = "BaseElement"
+    default_events: Dict[str, str] = {"get_size": "get_size",
+                                      "update": "update",
+                                      "render": "render",
+                                      "build": "build",
+                                      "select": "select",
+                                      "deselect": "deselect",
+                                      "paste": "on_paste",
+                                      "mouse": "on_mouse"}
+    """Events bound to methods of every instance, by event name"""
+    default_flags: Dict[str, bool] = {"isFixedSize": False}
+    """Flag values of new instances"""
+    default_flag_bits: int = 0
+    """Bitset of default_flags, computed for every subclass"""
+    default_key_bindings: Tuple[Tuple[str, Union[str, Tuple]], ...] = ()
+    """Method names and keys, or names of element attributes holding keys, bound when keyboard handler is created"""
+    render_memoized: bool = True
+    """Whether render result depends only on element version, so drawn output of unchanged element is reused"""
 
     @runtime_checkable
     class BaseFlags(Protocol):
@@ -21,38 +64,154 @@ class BaseElement(ABC):
         """
         :param position: Element position in [x, y] format
         """
-        self.position: Position = Position(*kwargs.pop("position", [0, 0]))
+        self._position: Position = Position(*kwargs.pop("position", [0, 0]))
         self.size: Size = Size(0, 0)
+        self.parent: Optional['AbstractLayout'] = None
+        """Layout that contains element"""
         self.tag: str = kwargs.pop("tag", self.class_base_tag)
         self.state: ElementState = ElementState.MISSED
-
-        self.flags: BaseElement.BaseFlags = FlagsController(self)
-        self.keyboard: KeyboardHandler = KeyboardHandler(self)
+        self.dirty: bool = True
+        """Whether element needs update and get_size passes"""
+        self.version: int = 0
+        """Counter of element changes, increases on every invalidation"""
+        self.flag_bits: int = self.default_flag_bits
+        """Bitset of flags registered in flag_registry"""
         self.event: EventManager = EventManager(self)
-        self.event.set_events(get_size=self.get_size,
-                              update=self.update,
-                              render=self.render,
-                              build=self.build,
-                              select=self.select,
-                              deselect=self.deselect)
-        self.flags.isFixedSize = False
+        self._flags: Optional[FlagsController] = None
+        self._keyboard: Optional[KeyboardHandler] = None
 
         if "flags" in kwargs:
             for key, value in kwargs["flags"].items():
-                self.flags.set_flag("key", value)
-        logger.create(f"CREATE CLASS <{self.__class__.__name__}> (tag={self.tag}) (agrs={args}, kwargs={kwargs})")
+                self.flags.set_flag(key, value)
+        if logger.isEnabledFor(CREATE):
+            logger.create(f"CREATE CLASS <{self.__class__.__name__}> (tag={self.tag}) (agrs={args}, kwargs={kwargs})")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.default_flag_bits = flags_to_bits(cls.default_flags)
+
+    @property
+    def flags(self) -> BaseFlags:
+        """
+        Named access to element flag_bits, created on first access
+        """
+        if self._flags is None:
+            self._flags = FlagsController(self)
+        return self._flags
+
+    @property
+    def keyboard(self) -> KeyboardHandler:
+        """
+        Element keyboard handler, created on first access with default_key_bindings of element class.
+        Keys given as attribute name are read from element when handler is created
+        """
+        if self._keyboard is None:
+            self._keyboard = KeyboardHandler(self)
+            for method_name, keys in self.default_key_bindings:
+                if isinstance(keys, str):
+                    keys = getattr(self, keys)
+                self._keyboard.add_keyboard_event(getattr(self, method_name), keys=keys)
+        return self._keyboard
+
+    @property
+    def position(self) -> Position:
+        """
+        Element position in parent layout, changing it invalidates element
+        """
+        return self._position
+
+    @position.setter
+    def position(self, position: Position) -> None:
+        if position != self._position:
+            self._position = position
+            self.invalidate()
+
+    @property
+    def tag(self) -> str:
+        return self._tag
+
+    @tag.setter
+    def tag(self, tag: str) -> None:
+        old_tag, self._tag = getattr(self, "_tag", None), tag
+        layout = self.parent
+        while layout is not None:
+            layout._unindex_tag(self, old_tag)
+            layout._tag_index.setdefault(tag, {})[self] = None
+            layout._focus_index = None
+            layout = layout.parent
+
+    def invalidate(self) -> None:
+        """
+        Marks element and all its ancestors as changed, so they will be updated and rebuilt
+        """
+        self.dirty = True
+        self.version += 1
+        child, parent = self, self.parent
+        while parent is not None:
+            parent._dirty_elements[child] = None
+            parent.dirty = True
+            parent.version += 1
+            child, parent = parent, parent.parent
+        child.on_invalidate()
+
+    def on_flags_changed(self, bit: int) -> None:
+        """
+        Called after flag value was changed through flags, drops focus order of ancestors that filter by this flag
+        and invalidates element
+
+        :param bit: Bit of changed flag
+        """
+        layout = self.parent
+        while layout is not None:
+            if layout.focus_mask & bit:
+                layout._focus_index = None
+            layout = layout.parent
+        self.invalidate()
+
+    def on_paste(self, text: str) -> bool:
+        """
+        Called with text pasted while element is focused
+
+        :param text: Pasted text
+        :return: Whether text was handled, otherwise it is passed to parent layout
+        """
+        return False
+
+    def on_mouse(self, event: MouseInput) -> bool:
+        """
+        Called with mouse event over element or its child elements
+
+        :param event: Mouse event
+        :return: Whether event was handled, otherwise it is passed to parent layout
+        """
+        return False
+
+    def on_invalidate(self) -> None:
+        """
+        Called on topmost element of tree after any of its elements was invalidated
+        """
+
+    def clean(self) -> None:
+        """
+        Marks element as unchanged after update pass
+        """
+        self.dirty = False
 
     def select(self) -> None:
         """
         Sets widget state to "ElementState.SELECTED"
         """
-        self.state = ElementState.SELECTED
+        if self.state != ElementState.SELECTED:
+            self.state = ElementState.SELECTED
+            self.invalidate()
 
     def deselect(self) -> None:
         """
         Sets widget state to "ElementState.MISSED"
         """
-        self.state = ElementState.MISSED
+        if self.state != ElementState.MISSED:
+            self.state = ElementState.MISSED
+            self.invalidate()
 
     @overload
     def set_fixed_size(self, size: Union[Size, Tuple[int, int], List[int]]) -> None: ...
@@ -71,9 +230,11 @@ class BaseElement(ABC):
             self.size = Size(width, height)
         elif size:
             self.size = Size(*size)
+        self.invalidate()
 
     def set_floating_size(self):
         self.flags.isFixedSize = False
+        self.invalidate()
 
     @abstractmethod
     def get_size(self) -> Size:
@@ -95,41 +256,79 @@ class BaseElement(ABC):
         """
         raise NotImplementedError
 
+    def get_subtree(self) -> List[Self]:
+        """
+        Returns element and all its descendants
+
+        :return: List of elements
+        """
+        return [self]
+
     def build(self) -> Buffer:
         """
         Builds element buffer
 
         :return: Element buffer
         """
-        return Buffer(self.event.call.render, self.position, self.size)
+        return Buffer(self.event.call.render, self.position, self.size, element=self)
+
+
+BaseElement.default_flag_bits = flags_to_bits(BaseElement.default_flags)
 
 
 class AbstractWidget(BaseElement):
     """
-    Represents abstract class for interface widgets
+    Represents abstract class for interface widgets.
+    Render of widget is called on every draw unless it is decorated with memoize_render
     """
+    __slots__ = ("_render_memo", )
     class_base_tag = "AbstractWidget"
+    render_memoized = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.render_memoized = getattr(cls.render, "memoized", False)
 
     def __init__(self, *args, **kwargs):
         super(AbstractWidget, self).__init__(*args, **kwargs)
+        self._render_memo: Optional[Tuple[int, Union[str, List[Buffer]]]] = None
+        """Version and result of last call of render decorated with memoize_render"""
 
 
 class AbstractLayout(BaseElement):
     """
     Represents abstract class for interface elements layout
     """
+    __slots__ = ("elements", "_dirty_elements", "_render_cache", "_render_version", "_tag_index", "_class_index", "_focus_index", "_stylers")
     class_base_tag = "AbstractLayout"
+    default_events = {**BaseElement.default_events, "get_by_tag": "search_elements_by_tag"}
+    focus_mask: int = 0
+    """Flags that must be set on elements indexed in focus order"""
 
     def __init__(self, *args, **kwargs):
         super(AbstractLayout, self).__init__(*args, **kwargs)
         self.elements: Collection = Collection()
-        self.event.set.get_by_tag(self.search_elements_by_tag)
+        self._dirty_elements: Dict[BaseElement, None] = {}
+        """Changed child elements in order of invalidation"""
+        self._render_cache: List[Buffer] = []
+        self._render_version: int = -1
+        self._tag_index: Dict[str, Dict[BaseElement, None]] = {}
+        """All subtree elements by tag"""
+        self._class_index: Dict[type, Dict[BaseElement, None]] = {}
+        """All subtree elements by class"""
+        self._focus_index: Optional[FocusIndex] = None
+        """Focus order of subtree, built on first navigation after subtree change"""
+        self._stylers: Dict[BaseElement, partial] = {}
+        """Cached __style__ callables of child widgets"""
 
     @abstractmethod
     def __style__(self, element: Self) -> str:
         raise NotImplementedError
     @abstractmethod
     def __align__(self, elements: Collection) -> List[Buffer]:
+        """
+        Places buffers of visible elements, buffers are built with build_element so widgets render through __style__
+        """
         raise NotImplementedError
 
     @overload
@@ -152,29 +351,174 @@ class AbstractLayout(BaseElement):
         """
 
     def add_elements(self, *args, **kwargs):
+        for element in args:
+            if element.parent is not None:
+                element.parent.remove_elements(element)
         return_element = None
         if len(args) == 1 or kwargs.get("element", None):
             position = kwargs.get("position", None)
             return_element = args[0]
-            if not return_element.flags.isFixedSize:
+            if not return_element.flag_bits & FLAG_FIXED_SIZE:
                 if position:
                     return_element.position = (position if isinstance(position, Position) else Position(*position)) if position else return_element.position
             self.elements.append(return_element)
+            self._adopt_element(return_element)
         elif len(args) > 1:
             self.elements.extend(args)
+            for element in args:
+                self._adopt_element(element)
             return_element = Collection()
             return_element.extend(args)
         return return_element
 
+    def remove_elements(self, *elements: BaseElement) -> Collection:
+        """
+        Removes elements from collection
+
+        :param elements: Elements for removing from collection
+        :return: Collection of removed elements
+        """
+        return_list = Collection()
+        for element in elements:
+            if element.parent is not self:
+                continue
+            self.elements.remove(element)
+            self._dirty_elements.pop(element, None)
+            self._stylers.pop(element, None)
+            self._unindex_elements(element.get_subtree())
+            element.parent = None
+            return_list.append(element)
+        if return_list:
+            self.invalidate()
+        return return_list
+
+    def _adopt_element(self, element: BaseElement) -> None:
+        """
+        Links added element with layout, indexes its subtree and marks it as changed
+
+        :param element: Added element
+        """
+        element.parent = self
+        self._index_elements(element.get_subtree())
+        element.invalidate()
+
+    def _index_elements(self, elements: List[BaseElement]) -> None:
+        layout = self
+        while layout is not None:
+            tag_index, class_index = layout._tag_index, layout._class_index
+            for element in elements:
+                tag_index.setdefault(element.tag, {})[element] = None
+                class_index.setdefault(type(element), {})[element] = None
+            layout._focus_index = None
+            layout = layout.parent
+
+    def _unindex_elements(self, elements: List[BaseElement]) -> None:
+        layout = self
+        while layout is not None:
+            for element in elements:
+                layout._unindex_tag(element, element.tag)
+                bucket = layout._class_index.get(type(element), {})
+                bucket.pop(element, None)
+                if not bucket:
+                    layout._class_index.pop(type(element), None)
+            layout._focus_index = None
+            layout = layout.parent
+
+    def _unindex_tag(self, element: BaseElement, tag: str) -> None:
+        bucket = self._tag_index.get(tag, {})
+        bucket.pop(element, None)
+        if not bucket:
+            self._tag_index.pop(tag, None)
+
+    def get_subtree(self) -> List[BaseElement]:
+        return_list = [self]
+        for bucket in self._class_index.values():
+            return_list.extend(bucket)
+        return return_list
+
+    def get_dirty_elements(self) -> Collection:
+        """
+        Returns child elements changed since last update pass
+
+        :return: Collection of changed elements
+        """
+        return_list = Collection()
+        return_list.extend(self._dirty_elements)
+        return return_list
+
+    def clean(self) -> None:
+        """
+        Marks layout and its changed subtree as unchanged after update pass
+        """
+        dirty_elements, self._dirty_elements = self._dirty_elements, {}
+        for element in dirty_elements:
+            element.clean()
+        super().clean()
+
     def search_elements_by_tag(self, tag: str) -> Collection:
-        return (self.elements.get_elements_collection(lambda element: element.tag == tag) +
-                sum(self.elements.call_elements_event("get_by_tag", lambda element: isinstance(element, AbstractLayout), args=[tag]), []))
+        """
+        Returns all subtree elements with given tag using index maintained by add_elements, remove_elements and tag changes
+
+        :param tag: Element tag
+        :return: Collection of elements
+        """
+        return_list = Collection()
+        return_list.extend(self._tag_index.get(tag, ()))
+        return return_list
+
+    def search_elements_by_class(self, cls: type) -> Collection:
+        """
+        Returns all subtree elements that are instances of given class
+
+        :param cls: Element class
+        :return: Collection of elements
+        """
+        return_list = Collection()
+        for element_class, bucket in self._class_index.items():
+            if issubclass(element_class, cls):
+                return_list.extend(bucket)
+        return return_list
 
     def update(self):
-        return self.elements.call_elements_event("update")
+        return self.get_dirty_elements().call_elements_event("update")
+
+    def get_visible_elements(self) -> Collection:
+        """
+        Returns child elements that are styled and aligned by render, without culling it is elements collection itself
+
+        :return: Collection of elements, must not be modified
+        """
+        return self.elements
+
+    def get_styler(self, element: BaseElement) -> partial:
+        """
+        Returns cached callable that renders child widget through __style__
+
+        :param element: Child widget
+        :return: Function without arguments
+        """
+        styler = self._stylers.get(element)
+        if styler is None:
+            styler = self._stylers[element] = partial(self.__style__, element)
+        return styler
+
+    def build_element(self, element: BaseElement) -> Buffer:
+        """
+        Builds buffer of child element, widget buffers render through layout style
+
+        :param element: Child element
+        :return: Element buffer
+        """
+        buffer = element.event.call.build()
+        # widget event tables stay untouched, only the new buffer is styled
+        if isinstance(element, AbstractWidget):
+            buffer.function = self.get_styler(element)
+        return buffer
 
     def render(self):
-        temp_elements = self.elements.get_elements_collection()
-        for element in temp_elements.get_elements_collection(lambda element: isinstance(element, AbstractWidget)):
-            element.event.set.render((lambda element: lambda: self.__style__(element))(element))
-        return self.__align__(temp_elements)
+        if self._render_version == self.version:
+            return self._render_cache
+        buffers = self.__align__(self.get_visible_elements())
+        self._render_cache = buffers
+        self._render_version = self.version
+        return self._render_cache
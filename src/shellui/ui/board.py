@@ -1,26 +1,32 @@
-from .abstracts import AbstractWidget, AbstractLayout, ElementState, BaseElement
+from .abstracts import AbstractWidget, AbstractLayout, ElementState, BaseElement, FLAG_FIXED_SIZE, memoize_render
 from ..common import Collection
 from ..common.debug import logger
-from ..common.types import List, Any, Size, Buffer
-from ..core.handler import CursorController
+from ..common.types import List, Any, Size, Buffer, Optional, Position, Tuple, Dict, Iterable, register_flag
+from ..common.text import TextMetrics, measure_text, text_width
+from ..core.handler import CursorController, FocusIndex
+from abc import abstractmethod
 import curses
 
 
+FLAG_ACTIVE_ELEMENT = register_flag("isActiveElement")
+FLAG_CHECKED = register_flag("isChecked")
+
+
 class BaseFlags(BaseElement.BaseFlags):
     isActiveElement: bool
 
 
 class Widget(AbstractWidget):
     """
-    Represents abstract class of widget for layout
+    Represents abstract class of widget for layout.
+    State that changes rendered text must be changed through setters that call invalidate(), so the widget is updated
+    and its size is measured again. Render is called on every draw unless it is decorated with memoize_render,
+    decorated render is called again only after invalidate()
     """
+    __slots__ = ()
     class_base_tag = "Widget"
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.flags: Widget.BaseFlags = self.flags
-        self.flags.isActiveElement = False
-        self.keyboard.add_keyboard_event(self.on_click, lambda key_char: key_char == 10)
+    default_flags = {**AbstractWidget.default_flags, "isActiveElement": False}
+    default_key_bindings = (("on_click", (10, )), )
 
     def update(self): ...
     def render(self): ...
@@ -29,18 +35,45 @@ class Widget(AbstractWidget):
 
 
 class Layout(AbstractLayout):
+    __slots__ = ("cursor", "_selected", "_style_cache", "_up_keys", "_down_keys")
     class_base_tag = "Layout"
+    DEFAULT_UP_KEYS = (curses.KEY_UP, curses.KEY_LEFT, curses.KEY_BTAB)
+    DEFAULT_DOWN_KEYS = (curses.KEY_DOWN, curses.KEY_RIGHT, 9)
+    default_flags = {**AbstractLayout.default_flags, "isActiveElement": True}
+    default_key_bindings = (("on_click", (10, )), ("key_up", "UP_KEYS"), ("key_down", "DOWN_KEYS"))
+    focus_mask = FLAG_ACTIVE_ELEMENT
 
     def __init__(self, *args, **kwargs):
+        self._up_keys: Optional[Tuple[int, ...]] = None
+        self._down_keys: Optional[Tuple[int, ...]] = None
         super().__init__(*args, **kwargs)
-        self.flags: Widget.BaseFlags = self.flags
-        self.cursor: CursorController = CursorController(self.elements)
-        self.flags.isActiveElement = True
-        self.UP_KEYS = [curses.KEY_UP, curses.KEY_LEFT, curses.KEY_BTAB]
-        self.DOWN_KEYS = [curses.KEY_DOWN, curses.KEY_RIGHT, 9]
-        self.keyboard.add_keyboard_event(self.on_click, lambda key_char: key_char == 10)
-        self.keyboard.add_keyboard_event(self.key_up, lambda key_char: key_char in self.UP_KEYS)
-        self.keyboard.add_keyboard_event(self.key_down, lambda key_char: key_char in self.DOWN_KEYS)
+        self.cursor: CursorController = CursorController(self.elements, parent=self)
+        self._selected: Optional[BaseElement] = None
+        """Child element selected by last select call"""
+        self._style_cache: Optional[Tuple[BaseElement, int, str, str]] = None
+        """Selected element, its version, cursor style and styled text"""
+
+    @property
+    def UP_KEYS(self) -> Tuple[int, ...]:
+        """
+        Keys bound to key_up, can be overridden in subclass or set on instance before keyboard is first used
+        """
+        return self.DEFAULT_UP_KEYS if self._up_keys is None else self._up_keys
+
+    @UP_KEYS.setter
+    def UP_KEYS(self, keys: Iterable[int]) -> None:
+        self._up_keys = tuple(keys)
+
+    @property
+    def DOWN_KEYS(self) -> Tuple[int, ...]:
+        """
+        Keys bound to key_down, can be overridden in subclass or set on instance before keyboard is first used
+        """
+        return self.DEFAULT_DOWN_KEYS if self._down_keys is None else self._down_keys
+
+    @DOWN_KEYS.setter
+    def DOWN_KEYS(self, keys: Iterable[int]) -> None:
+        self._down_keys = tuple(keys)
 
     def on_click(self, key) -> Any:
         current = self.cursor.current
@@ -48,72 +81,225 @@ class Layout(AbstractLayout):
             return current.keyboard.key_pressed(key)
 
     def key_up(self, key) -> bool:
-        if not any(self.cursor.current.keyboard.key_pressed(key)):
-            if self.cursor.move(-1, lambda current: current.flags.isActiveElement):
-                return True
-            return False
-        else:
-            return True
+        return self._navigate(key, -1)
 
     def key_down(self, key) -> bool:
-        lox = self.cursor.current.keyboard.key_pressed(key)
-        if not any(lox):
-            if self.cursor.move(1, lambda current: current.flags.isActiveElement):
-                return True
-            return False
-        else:
+        return self._navigate(key, 1)
+
+    def navigate(self, key: int, count: int = 1) -> List[Any]:
+        """
+        Handles count presses of key in a row. If key is bound only to key_up or key_down and focused leaf
+        does not handle it, focus is moved count leaves at once, else key is sent to keyboard handler count times
+
+        :param key: Key code
+        :param count: Count of presses
+        :return: Returned values of called events
+        """
+        events = self.keyboard.peek(key)
+        if count > 1 and events is not None and len(events) == 1 and events[0].function in (self.key_up, self.key_down):
+            focused = self.get_focused_element()
+            if focused is None or isinstance(focused, Layout) or focused.keyboard.peek(key) == []:
+                step = -count if events[0].function == self.key_up else count
+                if not self.focus_next(step):
+                    # repeated presses stop at the first or the last leaf
+                    return [self.focus(0 if step < 0 else -1)]
+                return [True]
+        return [value for _ in range(count) for value in self.keyboard.key_pressed(key)]
+
+    def _navigate(self, key: int, step: int) -> bool:
+        """
+        Sends key to focused leaf and moves focus if leaf did not handle it
+        """
+        focused = self.get_focused_element()
+        if focused is not None and not isinstance(focused, Layout) and any(focused.keyboard.key_pressed(key)):
             return True
+        return self.focus_next(step)
+
+    def get_focus_index(self) -> FocusIndex:
+        """
+        Returns focus order of active leaves in subtree, rebuilt only after subtree, tags or flags change
+
+        :return: Focus index
+        """
+        if self._focus_index is None:
+            self._focus_index = FocusIndex(self, self.focus_mask)
+        return self._focus_index
+
+    def get_focused_element(self) -> Optional[BaseElement]:
+        """
+        Follows cursors of nested layouts from this layout
+
+        :return: Deepest element under cursors, None if layout is empty
+        """
+        element = self.cursor.current
+        while isinstance(element, Layout) and element.cursor.current is not None:
+            element = element.cursor.current
+        return element
+
+    def set_cursor_position(self, position: int) -> None:
+        """
+        Moves cursor to child element position and marks layout as changed
+        """
+        if self.cursor.position != position:
+            self.cursor.position = position
+            self.invalidate()
+
+    def focus(self, index: int) -> bool:
+        """
+        Moves cursors of this and nested layouts to focusable leaf
+
+        :param index: Leaf index in focus order, negative index counts from the end
+        :return: Whether leaf exists
+        """
+        focus_index = self.get_focus_index()
+        if not -len(focus_index) <= index < len(focus_index):
+            return False
+        for layout, position in focus_index.get_path(index % len(focus_index)):
+            layout.set_cursor_position(position)
+        return True
+
+    def focus_next(self, step: int = 1) -> bool:
+        """
+        Moves focus to leaf step leaves after focused element
+
+        :param step: Count of leaves, negative to move backward
+        :return: Whether focus was moved
+        """
+        focus_index = self.get_focus_index()
+        focused = self.get_focused_element()
+        # elements inside inactive layout are not indexed, nearest indexed ancestor is used instead
+        while focused is not None and focused is not self and focused not in focus_index:
+            focused = focused.parent
+        if focused is None or focused is self:
+            return False
+        index = focus_index.get_next_index(focused, step)
+        return index is not None and self.focus(index)
+
+    def focus_tag(self, tag: str, occurrence: int = 0) -> bool:
+        """
+        Moves focus to focusable leaf with given tag
+
+        :param tag: Element tag
+        :param occurrence: Number of leaf among leaves with the same tag
+        :return: Whether leaf exists
+        """
+        indexes = self.get_focus_index().get_indexes_by_tag(tag)
+        return -len(indexes) <= occurrence < len(indexes) and self.focus(indexes[occurrence])
 
     def select(self):
-        self.cursor.current.event.call.select()
+        current = self.cursor.current
+        if current:
+            current.event.call.select()
+        self._selected = current
         return super().select()
 
     def deselect(self):
-        self.elements.call_elements_event("deselect", lambda element: element.flags.isActiveElement)
+        if self._selected is not None:
+            self._selected.event.call.deselect()
+        self._selected = None
         return super().deselect()
 
+    def remove_elements(self, *elements):
+        return_list = super().remove_elements(*elements)
+        if self._selected is not None and self._selected.parent is not self:
+            self._selected.event.call.deselect()
+            self._selected = None
+        if self.cursor.position >= len(self.elements):
+            self.cursor.position = max(len(self.elements) - 1, 0)
+        return return_list
+
+    def get_style_width(self, element: BaseElement) -> int:
+        """
+        Returns count of cells added before child element by __style__, cursor prefix is added to selected active widget
+
+        :param element: Child element
+        :rtype: int
+        """
+        if isinstance(element, AbstractWidget) and element.state == ElementState.SELECTED and element.flag_bits & FLAG_ACTIVE_ELEMENT:
+            return text_width(self.cursor.style % {"widget": ""})
+        return 0
+
     def get_size(self):
-        self.size = Size(0, 0)
+        width, height = 0, 0
         element: BaseElement
         for element in self.elements:
-            self.size.height += element.size.height
-            if element.size.width > self.size.width:
-                self.size.width = element.size.width
+            height += element.size.height
+            if element.size.width > width:
+                width = element.size.width
+        if self._selected is not None:
+            width = max(width, self._selected.size.width + self.get_style_width(self._selected))
+        self.size = Size(width, height)
         return self.size
 
     def update(self):
         return_list = super().update()
 
-        self.elements.call_elements_event("get_size", lambda element: not element.flags.isFixedSize)
-        if not self.flags.isFixedSize:
-            self.event.call.get_size()
+        if self.parent is None or self.state == ElementState.SELECTED:
+            if self.cursor.current is not self._selected:
+                self.event.call.deselect()
+            self.event.call.select()
 
-        self.event.call.deselect()
-        self.event.call.select()
+        # selection is changed first, because cursor prefix of selected widget is part of layout size
+        self.get_dirty_elements().get_elements_by_flags(exclude=FLAG_FIXED_SIZE).call_elements_event("get_size")
+        if not self.flag_bits & FLAG_FIXED_SIZE:
+            self.event.call.get_size()
+        self.clean()
         return return_list
 
     def __style__(self, element):
-        if element.state == ElementState.SELECTED and element.flags.isActiveElement:
-            return self.cursor.style % {"widget": element.render()}
+        if element.state == ElementState.SELECTED and element.flag_bits & FLAG_ACTIVE_ELEMENT:
+            style, cached = self.cursor.style, self._style_cache
+            if cached is not None and cached[0] is element and cached[1] == element.version and cached[2] is style \
+                    and element.render_memoized:
+                return cached[3]
+            styled = style % {"widget": element.event.call.render()}
+            self._style_cache = (element, element.version, style, styled)
+            return styled
         else:
-            return element.render()
+            return element.event.call.render()
 
 
 class Label(Widget):
     """
     Represents graphic text label element
     """
+    __slots__ = ("_text", "_metrics")
     class_base_tag = "Label"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.text: str = kwargs.pop("text", "")
+        self._text: str = kwargs.pop("text", "")
+        self._metrics: Optional[TextMetrics] = None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._text = text
+        self._metrics = None
+        self.invalidate()
+
+    def get_text_metrics(self) -> TextMetrics:
+        """
+        Returns line widths and offsets of text, measured once per text change
+        """
+        if self._metrics is None:
+            self._metrics = measure_text(self._text)
+        return self._metrics
+
+    def _fit_text_size(self, padding: int = 0) -> Size:
+        metrics = self.get_text_metrics()
+        width = metrics.width + padding
+        if self.size.width != width or self.size.height != metrics.height:
+            self.size = Size(width, metrics.height)
+        return self.size
 
     def get_size(self):
-        lines = self.text.split('\n')
-        self.size = Size(max(len(line) for line in lines), len(lines))
-        return self.size
+        return self._fit_text_size()
 
+    @memoize_render
     def render(self):
         return self.text
 
@@ -125,28 +311,21 @@ class Button(Label):
     """
     Represents graphical button element
     """
+    __slots__ = ()
     class_base_tag = "Button"
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.flags.isActiveElement = True
+    default_flags = {**Label.default_flags, "isActiveElement": True}
 
 
 class CheckBox(Label):
     """
     Represents graphical checkbox element
     """
+    __slots__ = ()
     class_base_tag = "CheckBox"
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.flags.isActiveElement = True
-        self.flags.isChecked = False
+    default_flags = {**Label.default_flags, "isActiveElement": True, "isChecked": False}
 
     def get_size(self):
-        lines = self.text.split('\n')
-        self.size = Size(4 + max(len(line) for line in lines), len(lines))
-        return self.size
+        return self._fit_text_size(4)
 
     def on_click(self, key):
         self.flags.isChecked = False if self.isChecked() else True
@@ -154,37 +333,366 @@ class CheckBox(Label):
     def isChecked(self):
         return self.flags.isChecked
 
+    @memoize_render
     def render(self):
         return f"[*] {self.text}" if self.isChecked() else f"[ ] {self.text}"
 
 
-class VLayout(Layout):
+class LinearLayout(Layout):
     """
-    Represents a vertical layout
+    Represents abstract class of layout that places elements one after another along one axis.
+    Order of elements and their offsets are kept between frames, so only elements after the changed one are moved
     """
-    class_base_tag = "VLayout"
+    __slots__ = ("_order", "_offsets", "_spacing", "_buffers", "_sizes", "_axis_total", "_cross_size")
+    class_base_tag = "LinearLayout"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._order: Optional[List[BaseElement]] = None
+        """Child elements in placement order, sorted by position on first align"""
+        self._offsets: List[int] = [0]
+        """Prefix sums of element extents, valid for the first len(_offsets) - 1 elements of order"""
+        self._spacing: int = 0
+        self._buffers: Dict[BaseElement, Tuple[int, Buffer]] = {}
+        """Element version and its last built buffer"""
+        self._sizes: Dict[BaseElement, Size] = {}
+        """Element sizes counted in _axis_total and _cross_size"""
+        self._axis_total: int = 0
+        """Sum of element extents along layout axis"""
+        self._cross_size: Optional[int] = 0
+        """Largest element extent across layout axis, None when it has to be found again"""
+
+    @abstractmethod
+    def get_axis_position(self, position: Position) -> int:
+        """
+        Returns coordinate of position along layout axis
+
+        :param position: Element position
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_axis_position(self, position: Position, offset: int) -> Position:
+        """
+        Returns position moved to offset along layout axis
+
+        :param position: Element position
+        :param offset: Coordinate along layout axis
+        :rtype: Position
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_axis_size(self, size: Size) -> int:
+        """
+        Returns length of size along layout axis
+
+        :param size: Element size
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_cross_size(self, size: Size) -> int:
+        """
+        Returns length of size across layout axis
+
+        :param size: Element size
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_size(self, axis_size: int, cross_size: int) -> Size:
+        """
+        Returns size with given lengths along and across layout axis
+
+        :rtype: Size
+        """
+        raise NotImplementedError
+
+    def get_spacing(self) -> int:
+        """
+        Returns count of cells between neighbour elements
+        """
+        return 0
+
+    def get_size(self):
+        # child size changes only together with invalidation, so only changed children are counted again
+        sizes, axis_total, cross_size = self._sizes, self._axis_total, self._cross_size
+        get_axis_size, get_cross_size = self.get_axis_size, self.get_cross_size
+        for element in self._dirty_elements:
+            size, old_size = element.size, sizes.get(element)
+            if size == old_size:
+                continue
+            sizes[element] = size
+            axis_total += get_axis_size(size)
+            if old_size is not None:
+                axis_total -= get_axis_size(old_size)
+                if get_cross_size(old_size) == cross_size and get_cross_size(size) < cross_size:
+                    # element with largest extent has shrunk
+                    cross_size = None
+            if cross_size is not None and get_cross_size(size) > cross_size:
+                cross_size = get_cross_size(size)
+        if cross_size is None:
+            cross_size = max(map(get_cross_size, sizes.values()), default=0)
+        self._axis_total, self._cross_size = axis_total, cross_size
+        axis_size = axis_total + self.get_spacing() * max(len(self.elements) - 1, 0)
+        # only selected element is styled with cursor prefix
+        selected = self._selected
+        style_width = self.get_style_width(selected) if selected is not None else 0
+        if style_width:
+            styled = Size(selected.size.width + style_width, selected.size.height)
+            axis_size += self.get_axis_size(styled) - self.get_axis_size(selected.size)
+            cross_size = max(cross_size, self.get_cross_size(styled))
+        self.size = self.create_size(axis_size, cross_size)
+        return self.size
+
+    def add_elements(self, *args, **kwargs):
+        if kwargs.get("position", None):
+            # element placed by position, order is sorted again on next align
+            self._order = None
+        return super().add_elements(*args, **kwargs)
+
+    def _adopt_element(self, element: BaseElement) -> None:
+        super()._adopt_element(element)
+        if self._order is not None:
+            self._order.append(element)
+
+    def remove_elements(self, *elements: BaseElement) -> Collection:
+        return_list = super().remove_elements(*elements)
+        for element in return_list:
+            self._buffers.pop(element, None)
+            size = self._sizes.pop(element, None)
+            if size is not None:
+                self._axis_total -= self.get_axis_size(size)
+                if self.get_cross_size(size) == self._cross_size:
+                    self._cross_size = None
+        if return_list and self._order is not None:
+            removed = set(return_list)
+            index = next(index for index, element in enumerate(self._order) if element in removed)
+            self._order = [element for element in self._order if element not in removed]
+            del self._offsets[index + 1:]
+        return return_list
 
     def __align__(self, elements):
+        order, offsets, cached_buffers = self._order, self._offsets, self._buffers
+        if order is None or len(order) != len(elements):
+            order = self._order = sorted(elements, key=lambda element: self.get_axis_position(element.position))
+            del offsets[1:]
+        spacing = self.get_spacing()
+        if spacing != self._spacing:
+            self._spacing = spacing
+            del offsets[1:]
+
         matrix: List[Buffer] = []
-        temp_pos = 0
-        for buffer in sorted(elements.call_elements_event("build"), key=lambda element: element.position.y):
-            buffer.position.y = temp_pos
-            temp_pos += buffer.size.height
-            matrix.append(buffer)
+        placed = valid = min(len(offsets) - 1, len(order))
+        moved = False
+        for index, element in enumerate(order):
+            version_buffer = cached_buffers.get(element)
+            if version_buffer is None or version_buffer[0] != element.version:
+                version_buffer = cached_buffers[element] = (element.version, self.build_element(element))
+                if index < placed and self.get_axis_position(element.position) != offsets[index]:
+                    moved = True
+                elif index < valid and offsets[index] + self.get_axis_size(version_buffer[1].size) + spacing != offsets[index + 1]:
+                    valid = index
+            matrix.append(version_buffer[1])
+
+        if moved:
+            # element was moved by its position, placed elements are sorted again and elements not placed yet stay last
+            end = offsets[placed]
+            keys = [self.get_axis_position(element.position) if index < placed else end for index, element in enumerate(order)]
+            indexes = sorted(range(len(order)), key=keys.__getitem__)
+            order[:] = [order[index] for index in indexes]
+            matrix = [matrix[index] for index in indexes]
+            valid = 0
+
+        # only elements after the first resized one are moved
+        del offsets[valid + 1:]
+        for index in range(valid, len(order)):
+            buffer = matrix[index]
+            buffer.position = self.set_axis_position(buffer.position, offsets[index])
+            order[index]._position = buffer.position
+            offsets.append(offsets[index] + self.get_axis_size(buffer.size) + spacing)
         return matrix
 
 
-class HLayout(Layout):
+class VLayout(LinearLayout):
     """
     Represents a vertical layout
     """
+    __slots__ = ()
+    class_base_tag = "VLayout"
+
+    def get_axis_position(self, position):
+        return position.y
+
+    def set_axis_position(self, position, offset):
+        return position.replace(y=offset)
+
+    def get_axis_size(self, size):
+        return size.height
+
+    def get_cross_size(self, size):
+        return size.width
+
+    def create_size(self, axis_size, cross_size):
+        return Size(cross_size, axis_size)
+
+
+class HLayout(LinearLayout):
+    """
+    Represents a horizontal layout
+    """
+    __slots__ = ()
     class_base_tag = "HLayout"
 
+    def get_axis_position(self, position):
+        return position.x
+
+    def set_axis_position(self, position, offset):
+        return position.replace(x=offset)
+
+    def get_axis_size(self, size):
+        return size.width
+
+    def get_cross_size(self, size):
+        return size.height
+
+    def create_size(self, axis_size, cross_size):
+        return Size(axis_size, cross_size)
+
+    def get_spacing(self):
+        return text_width(self.cursor.style % {"widget": ""})
+
+
+class ScrollLayout(VLayout):
+    """
+    Represents a vertical layout with rows of equal height that builds only rows visible in its viewport
+    """
+    __slots__ = ("height", "viewport_height", "row_height", "overscan", "offset")
+    class_base_tag = "ScrollLayout"
+    SCROLL_LINES = 3
+    """Lines scrolled by one step of mouse wheel"""
+
+    def __init__(self, *args, **kwargs):
+        """
+        :param height: Viewport height in lines, viewport is made lower when it does not fit screen after resize
+        :param row_height: Height of every row in lines
+        :param overscan: Count of rows around viewport whose buffers are kept for scrolling
+        """
+        super().__init__(*args, **kwargs)
+        self.height: int = kwargs.pop("height", 10)
+        """Requested viewport height"""
+        self.viewport_height: int = self.height
+        self.row_height: int = kwargs.pop("row_height", 1)
+        self.overscan: int = kwargs.pop("overscan", 2)
+        self.offset: int = 0
+        """First visible line"""
+
+    def get_window(self) -> Tuple[int, int]:
+        """
+        Returns range of rows visible in viewport
+
+        :return: Index of first visible row and index after last visible row
+        """
+        first = self.offset // self.row_height
+        last = min(-(-(self.offset + self.viewport_height) // self.row_height), len(self.elements))
+        return first, last
+
+    def scroll_to(self, offset: int) -> int:
+        """
+        Sets first visible line
+
+        :param offset: Line number
+        :return: First visible line after clamping to content height
+        """
+        offset = max(min(offset, len(self.elements) * self.row_height - self.viewport_height), 0)
+        if offset != self.offset:
+            self.offset = offset
+            self.invalidate()
+        return self.offset
+
+    def fit_screen(self, size: Size) -> None:
+        """
+        Sets viewport height to the part of requested height that fits between layout top and screen bottom
+
+        :param size: Screen size
+        """
+        top, element = 0, self
+        while element is not None:
+            top += element.position.y
+            element = element.parent
+        viewport_height = max(min(self.height, size.height - top), 1)
+        if viewport_height != self.viewport_height:
+            self.viewport_height = viewport_height
+            self.invalidate()
+            self.scroll_to(self.offset)
+            self.scroll_to_element(self.cursor.position)
+
+    def scroll_by(self, lines: int) -> int:
+        return self.scroll_to(self.offset + lines)
+
+    def remove_elements(self, *elements: BaseElement) -> Collection:
+        return_list = super().remove_elements(*elements)
+        # viewport below shortened content is moved back to it
+        self.scroll_to(self.offset)
+        return return_list
+
+    def scroll_to_element(self, index: int) -> int:
+        """
+        Scrolls viewport the least distance needed to show row
+
+        :param index: Row index
+        :return: First visible line
+        """
+        top = index * self.row_height
+        if top < self.offset:
+            return self.scroll_to(top)
+        if top + self.row_height > self.offset + self.viewport_height:
+            return self.scroll_to(top + self.row_height - self.viewport_height)
+        return self.offset
+
+    def set_cursor_position(self, position: int) -> None:
+        super().set_cursor_position(position)
+        self.scroll_to_element(position)
+
+    def on_mouse(self, event):
+        if event.button in (4, 5) and event.pressed:
+            self.scroll_by((-1 if event.button == 4 else 1) * self.SCROLL_LINES)
+            return True
+        return False
+
+    def get_visible_elements(self):
+        first, last = self.get_window()
+        return_list = Collection()
+        return_list.extend(self.elements[max(first - self.overscan, 0):last + self.overscan])
+        return return_list
+
+    def get_size(self):
+        first, last = self.get_window()
+        width = max((element.size.width for element in self.elements[first:last]), default=0)
+        selected = self._selected
+        if selected is not None and first <= self.cursor.position < last:
+            width = max(width, selected.size.width + self.get_style_width(selected))
+        self.size = Size(width, self.viewport_height)
+        return self.size
+
     def __align__(self, elements):
         matrix: List[Buffer] = []
-        temp_pos = 0
-        for buffer in sorted(elements.call_elements_event("build"), key=lambda element: element.position.x):
-            buffer.position.x = temp_pos
-            temp_pos += buffer.size.width + len(self.cursor.style % {"widget": ""})
-            matrix.append(buffer)
+        first, last = self.get_window()
+        start = max(first - self.overscan, 0)
+        buffers: Dict[BaseElement, Tuple[int, Buffer]] = {}
+        for index, element in enumerate(elements, start):
+            version_buffer = self._buffers.get(element)
+            if version_buffer is None or version_buffer[0] != element.version:
+                version_buffer = (element.version, self.build_element(element))
+            buffers[element] = version_buffer
+            if first <= index < last:
+                buffer = version_buffer[1]
+                element._position = buffer.position = element.position.replace(y=index * self.row_height - self.offset)
+                matrix.append(buffer)
+        self._buffers = buffers
         return matrix
+
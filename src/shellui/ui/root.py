@@ -1,39 +1,204 @@
 from .abstracts import BaseElement
-from .board import Layout
+from .board import Layout, ScrollLayout
 from ..common import Collection
+from ..common.types import Callable, Optional, Iterable, Union, KeyInput, PasteInput, Size, MouseInput
+from ..common.debug import profiler
 from ..core.terminal import Terminal
+from ..core.loop import FrameScheduler, Timers
+from ..core.input import InputDecoder
+import asyncio
+import curses
 
 
 class Root(Layout):
     """
     Represents link between layout and terminal
     """
+    default_events = {**Layout.default_events, "resize": "on_resize"}
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
-        cls.terminal = Terminal()
+        instance.terminal = kwargs.get("terminal", None) or Terminal(kwargs.get("backend", None))
         cls.layout: BaseElement
         return instance
 
+    def __init__(self, *args, **kwargs):
+        """
+        :param fps: Maximum count of frames per second drawn by run loop
+        :param terminal: Terminal used by root, created if not passed
+        :param backend: Backend of created terminal, CursesBackend by default
+        :param batch_input: Read all entered keys at once, merge repeated navigation keys and read bracketed paste
+        :param resize_delay: Seconds without new resize after which run loop resizes terminal
+        :param paste_delay: Seconds run loop waits for the rest of bracketed paste start marker split between batches
+        :param mouse: Read mouse clicks and wheel scrolls
+        """
+        # flags passed to constructor invalidate root, which requests redraw from scheduler
+        self.scheduler: FrameScheduler = FrameScheduler(self.frame, kwargs.pop("fps", 30))
+        super().__init__(*args, **kwargs)
+        self.batch_input: bool = kwargs.pop("batch_input", False)
+        self.input_decoder: InputDecoder = InputDecoder()
+        self.resize_delay: float = kwargs.pop("resize_delay", 0.05)
+        self._resize_handle: Optional[asyncio.TimerHandle] = None
+        self.paste_delay: float = kwargs.pop("paste_delay", 0.05)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        if kwargs.pop("mouse", False):
+            self.terminal.set_mouse(True)
+        self.timers: Timers = Timers(self._fail)
+        self._stop_event: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+
     def __style__(self, element): ...
     def __align__(self, elements): ...
 
     def update(self):
         """
-        Updates layout's element state
+        Updates layout's element state if any of its elements was changed
         """
-        self.layout.event.call.update()
+        if self.layout.dirty:
+            self.layout.event.call.update()
+        self.clean()
 
     def read_keys(self):
         """
-        Reads key in terminal and sends it to layout's key_pressed event
+        Reads key in terminal and sends it to layout's key_pressed event.
+        In batch input mode keys entered after it are read without waiting and dispatched too
+        """
+        key = self.terminal.read()
+        if not self.batch_input:
+            self.dispatch_key(key)
+        elif key != -1:
+            self.dispatch_keys([key] + self.terminal.read_pending())
+
+    def dispatch_key(self, key: int):
+        """
+        Sends key to layout's key_pressed event, KEY_RESIZE requests resize instead
+        """
+        if key == curses.KEY_RESIZE:
+            return [self.request_resize()]
+        if key == curses.KEY_MOUSE:
+            return [self.dispatch_mouse(self.terminal.read_mouse())]
+        return self.layout.keyboard.key_pressed(key)
+
+    def dispatch_keys(self, keys: Iterable[int]) -> None:
+        """
+        Decodes batch of keys with input_decoder and dispatches decoded input in order.
+        Batch that ends with beginning of paste start marker keeps it for paste_delay while run loop is running,
+        else it is dispatched as keys immediately
+        """
+        self._dispatch_input(self.input_decoder.feed(keys))
+        if self.input_decoder.pending:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            if self._stop_event is None or not self.paste_delay:
+                return self.flush_input()
+            self._flush_handle = self.call_later(self.paste_delay, self.flush_input)
+
+    def flush_input(self) -> None:
+        """
+        Dispatches keys kept by input_decoder as keys
+        """
+        self._flush_handle = None
+        self._dispatch_input(self.input_decoder.flush())
+
+    def _dispatch_input(self, events: Iterable[Union[KeyInput, PasteInput]]) -> None:
+        for event in events:
+            if isinstance(event, PasteInput):
+                self.dispatch_paste(event.text)
+            elif event.count == 1 or event.key == curses.KEY_RESIZE:
+                self.dispatch_key(event.key)
+            elif isinstance(self.layout, Layout):
+                self.layout.navigate(event.key, event.count)
+            else:
+                for _ in range(event.count):
+                    self.dispatch_key(event.key)
+
+    def dispatch_paste(self, text: str) -> bool:
+        """
+        Sends pasted text to paste event of focused element and its parents,
+        text that is not handled is sent to layout's key_pressed event character by character
+
+        :return: Whether text was handled by paste event
         """
-        self.layout.keyboard.key_pressed(self.terminal.read())
+        element = self.layout.get_focused_element() if isinstance(self.layout, Layout) else self.layout
+        while element is not None and element is not self:
+            if element.event.call.paste(text):
+                return True
+            element = element.parent
+        for char in text:
+            self.dispatch_key(ord(char))
+        return False
 
     def set_layout(self, layout: BaseElement) -> None:
         """
         Sets main layout for root
         """
+        if getattr(self, "layout", None) is not None:
+            self.remove_elements(self.layout)
         self.layout = layout
+        self.add_elements(layout)
+        layout.event.call.select()
+
+    def on_invalidate(self) -> None:
+        self.request_redraw()
+
+    def dispatch_mouse(self, event: Optional[MouseInput]) -> bool:
+        """
+        Sends mouse event to mouse event of element under pointer and its parents.
+        Left click that is not handled focuses active element under pointer and presses enter on it
+
+        :param event: Mouse event, None is ignored
+        :return: Whether event was handled
+        """
+        if event is None:
+            return False
+        element = self.terminal.hit_test(event.y, event.x)
+        target = element
+        while target is not None and target is not self:
+            if target.event.call.mouse(event):
+                return True
+            target = target.parent
+        if event.button != 1 or not event.pressed or not isinstance(self.layout, Layout):
+            return False
+        focus_index = self.layout.get_focus_index()
+        while element is not None and element is not self:
+            index = focus_index.index_of(element)
+            if index is not None:
+                self.layout.focus(index)
+                self.dispatch_key(10)
+                return True
+            element = element.parent
+        return False
+
+    def request_resize(self) -> None:
+        """
+        Resizes terminal when no new resize was requested for resize_delay seconds while run loop is running,
+        else resizes it immediately
+        """
+        if self._stop_event is None or not self.resize_delay:
+            return self.resize()
+        if self._resize_handle is not None:
+            self._resize_handle.cancel()
+        self._resize_handle = self.call_later(self.resize_delay, self.resize)
+
+    def resize(self) -> None:
+        """
+        Adapts terminal to its new size, fits viewports of scroll layouts to the new screen and redraws screen.
+        Other elements are not updated because their sizes depend on their contents, elements that depend on screen size
+        are updated by resize event
+        """
+        self._resize_handle = None
+        if self.terminal.resize():
+            size = self.terminal.size
+            for layout in self.search_elements_by_class(ScrollLayout):
+                layout.fit_screen(size)
+            self.event.call.resize(size)
+        self.request_redraw()
+
+    def on_resize(self, size: Size) -> None:
+        """
+        Called after screen size changed, elements that depend on screen size should be changed here
+
+        :param size: New screen size
+        """
 
     def render(self):
         self.refresh()
@@ -43,3 +208,131 @@ class Root(Layout):
         Sets rendering buffer for terminal and builds layout's element buffer
         """
         self.terminal.set_buffer(self.layout.event.call.build())
+
+    def frame(self) -> None:
+        """
+        Updates layout, builds its buffer and draws it to terminal
+        """
+        if profiler.enabled:
+            return profiler.measure_frame(self, self._profiled_frame)
+        self.update()
+        self.refresh()
+        self.terminal.draw()
+
+    def _profiled_frame(self) -> None:
+        profiler.measure(self, "update", self.update)
+        profiler.measure(self, "refresh", self.refresh)
+        profiler.measure(self.terminal, "draw", self.terminal.draw)
+
+    def request_redraw(self) -> None:
+        """
+        Requests frame from run loop, requests made before the frame is drawn are merged into one
+        """
+        self.scheduler.request()
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Optional[asyncio.TimerHandle]:
+        """
+        Calls function or coroutine function after delay in run loop.
+        Called before run loop is started, it is scheduled when loop starts and returns None instead of handle
+        """
+        return self.timers.call_later(delay, callback, *args)
+
+    def call_every(self, interval: float, callback: Callable, *args) -> Optional[asyncio.Task]:
+        """
+        Calls function or coroutine function every interval in run loop.
+        Called before run loop is started, it is scheduled when loop starts and returns None instead of task
+        """
+        return self.timers.call_every(interval, callback, *args)
+
+    def _read_pending_keys(self) -> None:
+        try:
+            if self.batch_input:
+                return self.dispatch_keys(self.terminal.read_pending())
+            key = self.terminal.read()
+            while key != -1:
+                self.dispatch_key(key)
+                key = self.terminal.read()
+        except Exception as exception:
+            self._fail(exception)
+
+    def _fail(self, exception: BaseException) -> None:
+        if self._error is None:
+            self._error = exception
+        self.stop()
+
+    async def _poll_keys(self) -> None:
+        while True:
+            self._read_pending_keys()
+            await asyncio.sleep(self.scheduler.frame_interval or 0.01)
+
+    async def run_async(self) -> None:
+        """
+        Runs event loop that reads keys without blocking, runs timers and draws requested frames until stop is called
+        """
+        loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._error = None
+        self.terminal.set_blocking(False)
+        if self.batch_input:
+            self.terminal.set_bracketed_paste(True)
+
+        poll_task = None
+        resize_fileno = self.terminal.backend.resize_fileno()
+        if resize_fileno is not None:
+            loop.add_reader(resize_fileno, self._read_pending_keys)
+        fileno = self.terminal.fileno()
+        if fileno is None:
+            poll_task = asyncio.ensure_future(self._poll_keys())
+        else:
+            try:
+                loop.add_reader(fileno, self._read_pending_keys)
+            except (ValueError, OSError):
+                # descriptors that can not be watched are polled
+                poll_task = asyncio.ensure_future(self._poll_keys())
+        scheduler_task = asyncio.ensure_future(self.scheduler.run())
+        stop_task = asyncio.ensure_future(self._stop_event.wait())
+        self.timers.start()
+        self.request_redraw()
+        try:
+            tasks = {scheduler_task, stop_task} | ({poll_task} if poll_task else set())
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not stop_task and task.exception() is not None and self._error is None:
+                    self._error = task.exception()
+        finally:
+            if poll_task is None:
+                loop.remove_reader(fileno)
+            if resize_fileno is not None:
+                loop.remove_reader(resize_fileno)
+            self._resize_handle = None
+            if self._flush_handle is not None:
+                # kept keys stay in input_decoder and are decoded with the next batch
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            for task in (scheduler_task, stop_task, poll_task):
+                if task is not None:
+                    task.cancel()
+            self.timers.cancel_all()
+            self.terminal.set_blocking(True)
+            if self.batch_input:
+                self.terminal.set_bracketed_paste(False)
+            self._stop_event = None
+        if self._error is not None:
+            raise self._error
+
+    def run(self, fps: float = None) -> None:
+        """
+        Runs run_async in new asyncio event loop
+
+        :param fps: Maximum count of frames per second
+        """
+        if fps is not None:
+            self.scheduler.fps = fps
+        asyncio.run(self.run_async())
+
+    def stop(self) -> None:
+        """
+        Stops run loop after current callback
+        """
+        if self._stop_event is not None:
+            self._stop_event.set()
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from shellui.core import AnsiBackend
+from shellui.core.frame import Frame
+
+
+@pytest.fixture
+def pipe_backend():
+    read_fd, write_fd = os.pipe()
+    backend = AnsiBackend(input_fd=read_fd, output_fd=write_fd)
+    yield backend, read_fd
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def test_get_move():
+    move = AnsiBackend.get_move
+    assert move(None, 0, 0) == b"\x1b[1H"
+    assert move(None, 4, 9) == b"\x1b[5;10H"
+    assert move((2, 3), 2, 3) == b""
+    assert move((2, 3), 2, 4) == b"\x1b[C"
+    assert move((2, 3), 2, 1) == b"\x1b[2D"
+    assert move((2, 3), 3, 0) == b"\r\n"
+    assert move((2, 3), 0, 3) == b"\x1b[2A"
+    assert move((0, 0), 40, 70) == b"\x1b[41;71H"
+
+
+def test_frame_is_sent_with_one_write_inside_synchronized_output(pipe_backend, monkeypatch):
+    backend, read_fd = pipe_backend
+    writes = []
+
+    def write(fd, data):
+        writes.append(bytes(data))
+        return os_write(fd, data)
+
+    os_write = os.write
+    monkeypatch.setattr("shellui.core.backend.os.write", write)
+    backend.write(0, 0, "top")
+    backend.write(1, 0, "bottom")
+    backend.flush()
+    assert len(writes) == 1
+    output = os.read(read_fd, 1024)
+    assert output == writes[0]
+    assert output.startswith(b"\x1b[?2026h") and output.endswith(b"\x1b[?2026l")
+    assert b"top" in output and b"bottom" in output
+    backend.flush()
+    assert len(writes) == 1
+
+
+def test_short_unchanged_gap_is_written_again():
+    previous, frame = Frame(10, 1), Frame(10, 1)
+    frame.put(0, 0, "> hello")
+    assert frame.diff(previous) == [(0, 0, ">", 0), (0, 2, "hello", 0)]
+    assert frame.diff(previous, gap=AnsiBackend.MERGE_GAP) == [(0, 0, "> hello", 0)]
+
+
+def test_long_unchanged_gap_is_moved_over():
+    previous, frame = Frame(12, 1), Frame(12, 1)
+    frame.put(0, 0, "a    b")
+    frame.put(0, 9, "c", 1)
+    assert frame.diff(previous, gap=3) == [(0, 0, "a", 0), (0, 5, "b", 0), (0, 9, "c", 1)]
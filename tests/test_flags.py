@@ -0,0 +1,51 @@
+from shellui.common.types import Collection, flag_registry, register_flag, get_flags_mask, flags_to_bits
+from shellui.ui import Label, Button, FLAG_ACTIVE_ELEMENT, FLAG_FIXED_SIZE
+
+
+def test_registry_gives_every_flag_its_own_bit():
+    bit = register_flag("testRegistryFlag")
+    assert register_flag("testRegistryFlag") == bit
+    assert flag_registry["testRegistryFlag"] == bit
+    assert bit & (bit - 1) == 0
+    other = register_flag("testRegistryOther")
+    assert other != bit
+    assert get_flags_mask("testRegistryFlag", "testRegistryOther") == bit | other
+    assert flags_to_bits({"testRegistryFlag": True, "testRegistryOther": False}) == bit
+
+
+def create_collection():
+    button, label, fixed = Button(text="b"), Label(text="l"), Button(text="f")
+    fixed.set_fixed_size(1, 1)
+    collection = Collection()
+    collection.extend([button, label, fixed])
+    return collection, button, label, fixed
+
+
+def test_all_and_none_masks():
+    collection, button, label, fixed = create_collection()
+    assert list(collection.get_elements_by_flags(include=FLAG_ACTIVE_ELEMENT)) == [button, fixed]
+    assert list(collection.get_elements_by_flags(exclude=FLAG_ACTIVE_ELEMENT)) == [label]
+    assert list(collection.get_elements_by_flags(include=FLAG_ACTIVE_ELEMENT | FLAG_FIXED_SIZE)) == [fixed]
+    assert list(collection.get_elements_by_flags(include=FLAG_ACTIVE_ELEMENT, exclude=FLAG_FIXED_SIZE)) == [button]
+    assert list(collection.get_elements_by_flags()) == [button, label, fixed]
+
+
+def test_any_mask():
+    collection, button, label, fixed = create_collection()
+    assert list(collection.get_elements_by_flags(include_any=FLAG_ACTIVE_ELEMENT | FLAG_FIXED_SIZE)) == [button, fixed]
+    assert list(collection.get_elements_by_flags(include_any=FLAG_FIXED_SIZE, exclude=FLAG_ACTIVE_ELEMENT)) == []
+    label.set_fixed_size(1, 1)
+    assert list(collection.get_elements_by_flags(include_any=FLAG_FIXED_SIZE, exclude=FLAG_ACTIVE_ELEMENT)) == [label]
+
+
+def test_flag_registered_after_elements_were_created():
+    collection, button, label, fixed = create_collection()
+    late = register_flag("testLateFlag")
+    assert label.flags.testLateFlag is False
+    assert list(collection.get_elements_by_flags(exclude=late)) == [button, label, fixed]
+    label.flags.testLateFlag = True
+    assert label.flag_bits & late
+    assert list(collection.get_elements_by_flags(include=late)) == [label]
+    assert list(collection.get_elements_by_flags(include_any=late | FLAG_FIXED_SIZE)) == [label, fixed]
+    label.flags.testLateFlag = False
+    assert list(collection.get_elements_by_flags(include=late)) == []
@@ -0,0 +1,92 @@
+from shellui.core.handler import FocusIndex
+from shellui.ui import VLayout, HLayout, Button, Label, FLAG_ACTIVE_ELEMENT
+
+
+def create_tree():
+    # top: first, row(left, title, right), inactive(hidden), last
+    top, row, inactive = VLayout(), HLayout(), VLayout()
+    first, last = Button(text="first", tag="edge"), Button(text="last", tag="edge")
+    left, right = Button(text="left", tag="side"), Button(text="right", tag="side")
+    title, hidden = Label(text="title"), Button(text="hidden")
+    row.add_elements(left, title, right)
+    inactive.add_elements(hidden)
+    inactive.flags.isActiveElement = False
+    top.add_elements(first, row, inactive, last)
+    return top, row, inactive, (first, left, title, right, hidden, last)
+
+
+def test_leaves_in_depth_first_order():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    index = FocusIndex(top, FLAG_ACTIVE_ELEMENT)
+    assert index.elements == [first, left, right, last]
+    assert len(index) == 4
+    assert title in index and hidden not in index
+
+
+def test_index_of():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    index = FocusIndex(top, FLAG_ACTIVE_ELEMENT)
+    assert [index.index_of(element) for element in (first, left, right, last)] == [0, 1, 2, 3]
+    assert index.index_of(title) is None
+    assert index.index_of(row) is None
+    assert index.index_of(hidden) is None
+
+
+def test_next_and_previous_stop_at_ends():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    index = FocusIndex(top, FLAG_ACTIVE_ELEMENT)
+    assert index.get_next_index(first) == 1
+    assert index.get_next_index(left, 2) == 3
+    assert index.get_next_index(last) is None
+    assert index.get_next_index(last, -1) == 2
+    assert index.get_next_index(first, -1) is None
+    # not focusable element points between its neighbours
+    assert index.get_next_index(title) == 2
+    assert index.get_next_index(title, -1) == 1
+    assert index.get_next_index(inactive) == 3
+    assert index.get_next_index(hidden) is None
+
+
+def test_focus_wraps_negative_index_from_the_end():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    assert top.focus(-1)
+    assert top.get_focused_element() is last
+    assert top.focus(-3)
+    assert top.get_focused_element() is left
+    assert not top.focus(4) and not top.focus(-5)
+    assert top.get_focused_element() is left
+    assert not top.focus_next(3)
+    assert top.focus_next(-1)
+    assert top.get_focused_element() is first
+    assert not top.focus_next(-1)
+
+
+def test_tag_lookup():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    index = FocusIndex(top, FLAG_ACTIVE_ELEMENT)
+    assert index.get_indexes_by_tag("edge") == [0, 3]
+    assert index.get_indexes_by_tag("side") == [1, 2]
+    assert index.get_indexes_by_tag("missing") == []
+    assert top.focus_tag("side", -1)
+    assert top.get_focused_element() is right
+    assert not top.focus_tag("side", 2)
+
+
+def test_paths_through_nested_layouts():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    index = FocusIndex(top, FLAG_ACTIVE_ELEMENT)
+    assert index.get_path(0) == [(top, 0)]
+    assert index.get_path(2) == [(top, 1), (row, 2)]
+    assert index.get_path(3) == [(top, 3)]
+    assert top.focus(2)
+    assert (top.cursor.position, row.cursor.position) == (1, 2)
+
+
+def test_index_is_rebuilt_after_tree_change():
+    top, row, inactive, (first, left, title, right, hidden, last) = create_tree()
+    index = top.get_focus_index()
+    assert top.get_focus_index() is index
+    inactive.flags.isActiveElement = True
+    assert top.get_focus_index().elements == [first, left, right, hidden, last]
+    row.remove_elements(left)
+    assert top.get_focus_index().elements == [first, right, hidden, last]
@@ -0,0 +1,68 @@
+from shellui.core import MemoryBackend
+from shellui.core.frame import Frame
+from shellui.ui import Root, VLayout, Label
+
+
+def test_diff_of_equal_frames_is_empty():
+    previous, frame = Frame(8, 3), Frame(8, 3)
+    frame.put(1, 0, "same")
+    previous.put(1, 0, "same")
+    assert frame.diff(previous) == []
+
+
+def test_diff_emits_only_changed_runs():
+    previous, frame = Frame(10, 3), Frame(10, 3)
+    previous.put(0, 0, "hello")
+    previous.put(2, 0, "world")
+    frame.put(0, 0, "hxllo")
+    frame.put(1, 2, "new")
+    frame.put(2, 0, "world")
+    assert frame.diff(previous) == [(0, 1, "x", 0), (1, 2, "new", 0)]
+
+
+def test_diff_splits_runs_by_attribute():
+    previous, frame = Frame(10, 1), Frame(10, 1)
+    frame.put(0, 0, "ab", 1)
+    frame.put(0, 2, "cd", 2)
+    assert frame.diff(previous) == [(0, 0, "ab", 1), (0, 2, "cd", 2)]
+    previous.put(0, 0, "ab")
+    assert frame.diff(previous) == [(0, 0, "ab", 1), (0, 2, "cd", 2)]
+
+
+def test_diff_compares_only_given_rows():
+    previous, frame = Frame(4, 3), Frame(4, 3)
+    frame.put(0, 0, "a")
+    frame.put(2, 0, "b")
+    assert frame.diff(previous, [2]) == [(2, 0, "b", 0)]
+
+
+def test_diff_rewrites_whole_wide_character():
+    previous, frame = Frame(4, 1), Frame(4, 1)
+    previous.put(0, 0, "漢")
+    frame.put(0, 0, "漢")
+    # only second half of wide character differs
+    previous.attrs[1] = 1
+    assert frame.diff(previous) == [(0, 0, "漢", 0)]
+
+
+def test_stats_count_written_runs_and_cells():
+    backend = MemoryBackend(20, 3)
+    root = Root(backend=backend)
+    first, second = Label(text="first"), Label(text="second")
+    layout = VLayout()
+    layout.add_elements(first, second)
+    root.set_layout(layout)
+    root.frame()
+    stats = root.terminal.stats
+    assert (stats.runs_written, stats.cells_written) == (2, 11)
+    assert stats.total_cells_written == backend.cells_written == 11
+    backend.reset_stats()
+    second.text = "secund"
+    root.frame()
+    assert (stats.runs_written, stats.cells_written) == (1, 1)
+    assert (backend.writes, backend.cells_written) == (1, 1)
+    assert stats.total_cells_written == 12
+    root.frame()
+    assert (stats.runs_written, stats.cells_written) == (0, 0)
+    assert stats.frames == 3
+    assert backend.get_text() == "first\nsecund"
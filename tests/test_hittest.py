@@ -0,0 +1,50 @@
+from shellui.core import MemoryBackend
+from shellui.core.hittest import HitIndex
+from shellui.ui import Root, VLayout, Button
+
+
+def test_layer_replacement_keeps_other_layers():
+    index = HitIndex(10)
+    index.set_layer(None, [(0, 0, 10, 10, "plan")])
+    index.set_layer("region", [(2, 2, 4, 6, "button")])
+    assert index.hit(3, 3) == "button"
+    assert index.hit(0, 3) == "plan"
+    index.set_layer("region", [(5, 0, 6, 2, "moved")])
+    assert index.hit(3, 3) == "plan"
+    assert index.hit(5, 1) == "moved"
+    index.remove_layer("region")
+    assert index.hit(5, 1) == "plan"
+
+
+def test_layer_order():
+    index = HitIndex(10)
+    index.set_layer("top", [(0, 0, 1, 5, "top")])
+    index.set_layer("bottom", [(0, 0, 1, 10, "bottom")])
+    assert index.hit(0, 2) == "bottom"
+    index.set_order(["bottom", "top"])
+    assert index.hit(0, 2) == "top"
+    assert index.hit(0, 7) == "bottom"
+
+
+def test_rows_outside_screen_are_not_indexed():
+    index = HitIndex(5)
+    index.set_layer(None, [(0, 0, 100000, 3, "tall")])
+    assert index.hit(4, 1) == "tall"
+    assert index.hit(5, 1) is None
+    assert max(index._get_layer_rows(None)) == 4
+
+
+def test_terminal_hit_test_after_region_change():
+    root = Root(backend=MemoryBackend(20, 5))
+    layout = VLayout()
+    first, second = Button(text="first"), Button(text="second")
+    layout.add_elements(first, second)
+    root.set_layout(layout)
+    root.terminal.add_region(second, 1)
+    root.frame()
+    assert root.terminal.hit_test(0, 3) is first
+    assert root.terminal.hit_test(1, 3) is second
+    second.text = "second button"
+    root.frame()
+    assert root.terminal.hit_test(1, 12) is second
+    assert root.terminal.hit_test(0, 3) is first
@@ -0,0 +1,47 @@
+import curses
+import os
+import threading
+
+from shellui.common.types import KeyInput, PasteInput
+from shellui.core import AnsiBackend
+from shellui.core.input import InputDecoder, PASTE_START, PASTE_END
+
+
+def test_paste_start_split_between_batches():
+    decoder = InputDecoder()
+    text = [ord(char) for char in "hi"]
+    assert decoder.feed([ord("a"), *PASTE_START[:4]]) == [KeyInput(ord("a"))]
+    assert decoder.pending
+    assert decoder.feed([*PASTE_START[4:], *text, *PASTE_END[:2]]) == []
+    assert decoder.feed(PASTE_END[2:]) == [PasteInput("hi")]
+    assert not decoder.pending
+
+
+def test_kept_prefix_is_flushed_as_keys():
+    decoder = InputDecoder()
+    assert decoder.feed([27]) == []
+    assert decoder.flush() == [KeyInput(27)]
+    assert decoder.feed([27, ord("x")]) == [KeyInput(27), KeyInput(ord("x"))]
+
+
+def test_incomplete_escape():
+    assert AnsiBackend.is_incomplete_escape(b"a\x1b")
+    assert AnsiBackend.is_incomplete_escape(b"\x1b[20")
+    assert AnsiBackend.is_incomplete_escape(b"\x1b[<35;1")
+    assert not AnsiBackend.is_incomplete_escape(b"\x1b[A")
+    assert not AnsiBackend.is_incomplete_escape(b"abc")
+
+
+def test_ansi_backend_reads_escape_sequence_split_between_reads():
+    read_fd, write_fd = os.pipe()
+    backend = AnsiBackend(input_fd=read_fd, output_fd=os.open(os.devnull, os.O_WRONLY))
+    backend.ESCAPE_DELAY = 5
+    os.write(write_fd, b"\x1b[")
+    timer = threading.Timer(0.01, os.write, (write_fd, b"Bx"))
+    timer.start()
+    try:
+        assert [backend.read(), backend.read()] == [curses.KEY_DOWN, ord("x")]
+    finally:
+        timer.join()
+        for descriptor in (read_fd, write_fd, backend.output_fd):
+            os.close(descriptor)
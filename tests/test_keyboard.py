@@ -0,0 +1,110 @@
+from shellui.core.handler import KeyboardHandler
+
+
+def create_handler():
+    handler = KeyboardHandler()
+    pressed = []
+
+    def bind(name, keys=None, mode=None, rule=None):
+        return handler.add_keyboard_event(lambda key: pressed.append((name, chr(key))) or name, rule, keys, mode)
+    return handler, pressed, bind
+
+
+def test_single_keys_and_rules():
+    handler, pressed, bind = create_handler()
+    bind("a", keys=["a"])
+    bind("digit", rule=lambda key: chr(key).isdigit())
+    assert handler.key_pressed("a") == ["a"]
+    assert handler.key_pressed("7") == ["digit"]
+    assert handler.key_pressed("x") == []
+    assert pressed == [("a", "a"), ("digit", "7")]
+
+
+def test_chord_is_called_after_last_key():
+    handler, pressed, bind = create_handler()
+    bind("gg", keys=["gg"])
+    assert handler.key_pressed("g") == [True]
+    assert pressed == []
+    assert handler.key_pressed("g") == ["gg"]
+    assert pressed == [("gg", "g")]
+
+
+def test_broken_chord_replays_pending_keys():
+    handler, pressed, bind = create_handler()
+    bind("gg", keys=["gg"])
+    bind("g", keys=["g"])
+    bind("letter", rule=lambda key: chr(key).isalpha())
+    handler.key_pressed("g")
+    handler.key_pressed("x")
+    assert pressed == [("g", "g"), ("letter", "g"), ("letter", "x")]
+
+
+def test_broken_chord_calls_its_longest_bound_beginning():
+    handler, pressed, bind = create_handler()
+    bind("ab", keys=["ab"])
+    bind("abcd", keys=["abcd"])
+    bind("d", keys=["d"])
+    for key in "abcx":
+        handler.key_pressed(key)
+    assert pressed == [("ab", "b")]
+    for key in "abcd":
+        handler.key_pressed(key)
+    assert pressed[1:] == [("abcd", "d")]
+
+
+def test_replayed_key_can_start_new_chord():
+    handler, pressed, bind = create_handler()
+    bind("ab", keys=["ab"])
+    bind("bc", keys=["bc"])
+    for key in "abbc":
+        handler.key_pressed(key)
+    assert pressed == [("ab", "b"), ("bc", "c")]
+    handler.key_pressed("b")
+    assert handler.key_pressed("b") == [True]
+    assert handler.key_pressed("c") == ["bc"]
+
+
+def test_modes():
+    handler, pressed, bind = create_handler()
+    bind("default", keys=["i"])
+    bind("insert", keys=["i"], mode="insert")
+    bind("escape", keys=[27], mode="insert")
+    assert handler.key_pressed("i") == ["default"]
+    assert handler.key_pressed(27) == []
+    handler.set_mode("insert")
+    assert handler.key_pressed("i") == ["insert"]
+    assert handler.key_pressed(27) == ["escape"]
+    handler.set_mode()
+    assert handler.key_pressed("i") == ["default"]
+
+
+def test_set_mode_drops_pending_keys():
+    handler, pressed, bind = create_handler()
+    bind("gg", keys=["gg"])
+    bind("x", keys=["x"])
+    handler.key_pressed("g")
+    handler.set_mode("other")
+    assert handler.key_pressed("x") == ["x"]
+    assert pressed == [("x", "x")]
+
+
+def test_peek_does_not_call_events():
+    handler, pressed, bind = create_handler()
+    a = bind("a", keys=["a"])
+    bind("gg", keys=["gg"])
+    assert handler.peek(ord("a")) == [a]
+    assert handler.peek(ord("g")) is None
+    handler.key_pressed("g")
+    assert handler.peek(ord("a")) is None
+    assert pressed == []
+
+
+def test_remove_keyboard_event():
+    handler, pressed, bind = create_handler()
+    chord = bind("gg", keys=["gg"])
+    rule = bind("any", rule=lambda key: True)
+    handler.remove_keyboard_event(chord)
+    assert handler.key_pressed("g") == ["any"]
+    handler.remove_keyboard_event(rule)
+    assert handler.key_pressed("g") == []
+    assert pressed == [("any", "g")]
@@ -0,0 +1,61 @@
+from shellui.common.types import Buffer, Position, Size
+from shellui.core.terminal import Terminal
+
+
+def text_buffer(text, y, x, size, rendered):
+    def render():
+        rendered.append(text)
+        return text
+    return Buffer(render, Position(x, y), size)
+
+
+def tree(*buffers):
+    return Buffer(lambda: list(buffers), Position(0, 0), Size(100, 100))
+
+
+CLIP = (0, 0, 5, 10)
+
+
+def test_buffers_outside_screen_are_not_rendered():
+    rendered = []
+    plan = Terminal.compile_plan(tree(
+        text_buffer("visible", 1, 0, Size(7, 1), rendered),
+        text_buffer("below", 5, 0, Size(5, 1), rendered),
+        text_buffer("right", 0, 10, Size(5, 1), rendered),
+        text_buffer("above", -2, 0, Size(5, 2), rendered),
+        text_buffer("left", 0, -5, Size(5, 1), rendered),
+    ), clip=CLIP)
+    assert plan == [(1, 0, "visible", 0)]
+    assert rendered == ["visible"]
+
+
+def test_subtree_outside_screen_is_skipped():
+    rendered = []
+    child = text_buffer("child", 0, 0, Size(5, 1), rendered)
+    outside = Buffer(lambda: rendered.append("outside") or [child], Position(0, 7), Size(5, 1))
+    assert Terminal.compile_plan(tree(outside), clip=CLIP) == []
+    assert rendered == []
+
+
+def test_partly_visible_buffers_are_clipped():
+    rendered = []
+    plan = Terminal.compile_plan(tree(
+        text_buffer("a\nb\nc", -1, 0, Size(1, 3), rendered),
+        text_buffer("d\ne\nf", 3, 2, Size(1, 3), rendered),
+        text_buffer("wide", 0, 8, Size(4, 1), rendered),
+        text_buffer("cut", 4, -1, Size(3, 1), rendered),
+    ), clip=CLIP)
+    assert plan == [(0, 0, "b", 0), (1, 0, "c", 0), (3, 2, "d", 0), (4, 2, "e", 0), (0, 8, "wide", 0), (4, -1, "cut", 0)]
+
+
+def test_empty_size_is_treated_as_unknown():
+    rendered = []
+    plan = Terminal.compile_plan(tree(
+        text_buffer("unmeasured", 1, 0, Size(0, 0), rendered),
+        text_buffer("unknown", 2, 0, None, rendered),
+        text_buffer("above", -3, 0, Size(0, 0), rendered),
+        text_buffer("below", 6, 0, Size(0, 0), rendered),
+    ), clip=CLIP)
+    assert plan == [(1, 0, "unmeasured", 0), (2, 0, "unknown", 0)]
+    # unknown size above screen can not be culled before rendering, its lines are dropped
+    assert rendered == ["unmeasured", "unknown", "above"]
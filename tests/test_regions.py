@@ -0,0 +1,37 @@
+import curses
+
+from shellui.common.types import Size
+from shellui.core import MemoryBackend
+from shellui.ui import Root, VLayout, HLayout, Button, Label
+
+
+def create_root(layout, *elements):
+    backend = MemoryBackend(30, 5)
+    root = Root(backend=backend)
+    top = VLayout()
+    layout.add_elements(*elements)
+    top.add_elements(layout, Label(text="below"))
+    root.set_layout(top)
+    root.terminal.add_region(layout)
+    root.frame()
+    return root, backend
+
+
+def test_hlayout_region_is_not_cropped():
+    layout = HLayout()
+    root, backend = create_root(layout, Button(text="abc"), Button(text="def"))
+    assert layout.size.height == 1
+    assert layout.size.width >= len("> abcdef")
+    region = root.terminal._regions[layout]
+    assert (region.frame.width, region.frame.height) == (layout.size.width, 1)
+    assert backend.get_text().splitlines() == ["> abcdef", "below"]
+
+
+def test_vlayout_region_counts_cursor_prefix():
+    layout = VLayout()
+    root, backend = create_root(layout, Button(text="abc"), Button(text="defghi"))
+    assert layout.size == Size(6, 2)
+    root.dispatch_key(curses.KEY_DOWN)
+    root.frame()
+    assert layout.size == Size(8, 2)
+    assert backend.get_text().splitlines() == ["abc", "> defghi", "below"]
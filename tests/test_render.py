@@ -0,0 +1,103 @@
+from shellui.common.types import Size, Position
+from shellui.core import MemoryBackend
+from shellui.ui import Root, VLayout, Widget, Button, Label, memoize_render
+
+
+class Counter(Widget):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0
+
+    def render(self):
+        return f"v={self.value}"
+
+    def get_size(self):
+        self.size = Size(3, 1)
+        return self.size
+
+
+def create_root(*elements):
+    backend = MemoryBackend(20, 5)
+    root = Root(backend=backend)
+    layout = VLayout()
+    layout.add_elements(*elements)
+    root.set_layout(layout)
+    root.frame()
+    return root, layout, backend
+
+
+def test_widget_without_memoized_render_is_rendered_every_frame():
+    counter = Counter()
+    root, _, backend = create_root(Button(text="ok"), counter)
+    counter.value = 7
+    root.frame()
+    assert backend.get_text().splitlines()[1] == "v=7"
+
+
+def test_cursor_style_change_is_drawn():
+    root, layout, backend = create_root(Button(text="ok"))
+    layout.cursor.style = "* %(widget)s"
+    root.frame()
+    assert backend.get_text().splitlines()[0] == "* ok"
+
+
+class ActiveCounter(Counter):
+    default_flags = {**Counter.default_flags, "isActiveElement": True}
+
+
+def test_selected_widget_without_memoized_render_is_styled_every_frame():
+    counter = ActiveCounter()
+    root, _, backend = create_root(counter)
+    counter.value = 7
+    root.frame()
+    assert backend.get_text() == "> v=7"
+
+
+def test_memoized_render_is_called_only_after_invalidate():
+    calls = []
+
+    class Memoized(Counter):
+        @memoize_render
+        def render(self):
+            calls.append(self.value)
+            return f"v={self.value}"
+
+    counter = Memoized()
+    root, _, backend = create_root(counter)
+    counter.value = 7
+    root.frame()
+    assert backend.get_text() == "v=0" and calls == [0]
+    counter.invalidate()
+    root.frame()
+    assert backend.get_text() == "v=7" and calls == [0, 7]
+
+
+def test_linear_layout_moves_elements_after_resized_one():
+    labels = [Label(text=f"label {index}") for index in range(4)]
+    root, layout, backend = create_root(*labels)
+    assert [label.position.y for label in labels] == [0, 1, 2, 3]
+    labels[1].text = "two\nlines"
+    root.frame()
+    assert [label.position.y for label in labels] == [0, 1, 3, 4]
+    assert backend.get_text().splitlines() == ["label 0", "two", "lines", "label 2", "label 3"]
+
+
+def test_linear_layout_sorts_element_moved_by_position():
+    labels = [Label(text=text) for text in ("zero", "one", "two")]
+    root, layout, backend = create_root(*labels)
+    layout.elements[0].position = Position(0, 5)
+    root.frame()
+    assert backend.get_text().splitlines() == ["one", "two", "zero"]
+    assert [label.position.y for label in labels] == [2, 0, 1]
+
+
+def test_linear_layout_size_follows_resized_and_removed_elements():
+    labels = [Label(text=text) for text in ("a", "widest", "abc")]
+    root, layout, backend = create_root(*labels)
+    assert layout.size == Size(6, 3)
+    labels[1].set_text("w\nx")
+    root.frame()
+    assert layout.size == Size(3, 4)
+    layout.remove_elements(labels[2])
+    root.frame()
+    assert layout.size == Size(1, 3)
@@ -0,0 +1,45 @@
+from shellui.core import MemoryBackend
+from shellui.ui import Root, VLayout, ScrollLayout, Label, Button
+
+
+def create_root(width, height):
+    backend = MemoryBackend(width, height)
+    root = Root(backend=backend)
+    layout = VLayout()
+    scroll = ScrollLayout(height=10)
+    scroll.add_elements(*(Button(text=f"row {index}") for index in range(20)))
+    layout.add_elements(Label(text="title"), scroll)
+    root.set_layout(layout)
+    root.terminal.add_region(scroll)
+    root.frame()
+    return root, scroll, backend
+
+
+def resize(root, backend, width, height):
+    backend.set_size(width, height)
+    root.read_keys()
+    root.frame()
+
+
+def test_resize_fits_scroll_layout_viewport_and_region():
+    root, scroll, backend = create_root(20, 12)
+    assert scroll.viewport_height == 10
+    resize(root, backend, 20, 5)
+    assert scroll.viewport_height == 4
+    region = root.terminal._regions[scroll]
+    assert (region.frame.width, region.frame.height) == (scroll.size.width, 4)
+    assert backend.get_text().splitlines() == ["title", "row 0", "row 1", "row 2", "row 3"]
+    resize(root, backend, 20, 30)
+    assert scroll.viewport_height == 10
+    assert root.terminal._regions[scroll].frame.height == 10
+    assert len(backend.get_text().splitlines()) == 11
+
+
+def test_resize_keeps_cursor_visible():
+    root, scroll, backend = create_root(20, 12)
+    scroll.focus(7)
+    root.frame()
+    resize(root, backend, 20, 4)
+    assert scroll.viewport_height == 3
+    assert scroll.get_window()[0] <= 7 < scroll.get_window()[1]
+    assert backend.get_text().splitlines()[-1] == "row 7"
@@ -0,0 +1,13 @@
+from shellui.core import MemoryBackend
+from shellui.ui import Root, VLayout, Button
+
+
+def test_root_with_flags():
+    root = Root(backend=MemoryBackend(20, 5), flags={"isFixedSize": True})
+    assert root.flags.isFixedSize
+    assert root.scheduler.requests == 1
+    layout = VLayout()
+    layout.add_elements(Button(text="ok"))
+    root.set_layout(layout)
+    root.frame()
+    assert root.terminal.backend.get_text() == "> ok"
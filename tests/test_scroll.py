@@ -0,0 +1,69 @@
+import curses
+
+from shellui.core import MemoryBackend
+from shellui.ui import Root, ScrollLayout, Button
+
+
+def create_root(count=10, height=4):
+    backend = MemoryBackend(20, 6)
+    root = Root(backend=backend)
+    scroll = ScrollLayout(height=height)
+    rows = [Button(text=f"row {index}") for index in range(count)]
+    scroll.add_elements(*rows)
+    root.set_layout(scroll)
+    root.frame()
+    return root, scroll, rows, backend
+
+
+def test_window_after_scrolling():
+    root, scroll, rows, backend = create_root()
+    assert backend.get_text().splitlines() == ["> row 0", "row 1", "row 2", "row 3"]
+    assert scroll.scroll_to(3) == 3
+    root.frame()
+    assert scroll.get_window() == (3, 7)
+    assert backend.get_text().splitlines() == ["row 3", "row 4", "row 5", "row 6"]
+    assert [row.position.y for row in rows[3:7]] == [0, 1, 2, 3]
+    assert scroll.scroll_by(100) == 6
+    root.frame()
+    assert backend.get_text().splitlines() == ["row 6", "row 7", "row 8", "row 9"]
+
+
+def test_only_rows_around_window_are_built():
+    root, scroll, rows, backend = create_root(count=100)
+    scroll.scroll_to(50)
+    root.frame()
+    assert set(scroll._buffers) == set(rows[48:56])
+
+
+def test_focus_moving_past_viewport_scrolls():
+    root, scroll, rows, backend = create_root()
+    for _ in range(5):
+        scroll.keyboard.key_pressed(curses.KEY_DOWN)
+    root.frame()
+    assert (scroll.cursor.position, scroll.offset) == (5, 2)
+    assert backend.get_text().splitlines() == ["row 2", "row 3", "row 4", "> row 5"]
+    for _ in range(4):
+        scroll.keyboard.key_pressed(curses.KEY_UP)
+    root.frame()
+    assert (scroll.cursor.position, scroll.offset) == (1, 1)
+    assert backend.get_text().splitlines()[0] == "> row 1"
+
+
+def test_removing_elements_while_scrolled():
+    root, scroll, rows, backend = create_root()
+    scroll.scroll_to(6)
+    root.frame()
+    scroll.remove_elements(*rows[2:9])
+    root.frame()
+    assert scroll.offset == 0
+    assert backend.get_text().splitlines() == ["> row 0", "row 1", "row 9"]
+
+
+def test_removing_rows_above_window_keeps_offset():
+    root, scroll, rows, backend = create_root()
+    scroll.scroll_to(4)
+    root.frame()
+    scroll.remove_elements(rows[0])
+    root.frame()
+    assert scroll.offset == 4
+    assert backend.get_text().splitlines() == ["row 5", "row 6", "row 7", "row 8"]
@@ -0,0 +1,51 @@
+from shellui.ui import VLayout, HLayout, Button, Label
+
+
+def tagged(layout, tag):
+    return list(layout.search_elements_by_tag(tag))
+
+
+def test_tag_index_follows_add_and_remove():
+    layout = VLayout()
+    first, second = Button(text="1", tag="item"), Button(text="2", tag="item")
+    layout.add_elements(first, second, Label(text="3", tag="title"))
+    assert tagged(layout, "item") == [first, second]
+    layout.remove_elements(first)
+    assert tagged(layout, "item") == [second]
+    layout.remove_elements(second)
+    assert tagged(layout, "item") == []
+    assert "item" not in layout._tag_index
+    assert len(tagged(layout, "title")) == 1
+
+
+def test_moved_element_is_indexed_only_by_new_parent():
+    old, new = VLayout(), VLayout()
+    button = Button(text="ok", tag="item")
+    old.add_elements(button)
+    new.add_elements(button)
+    assert tagged(old, "item") == []
+    assert tagged(new, "item") == [button]
+
+
+def test_retagging_attached_element():
+    layout = VLayout()
+    button = Button(text="ok", tag="old")
+    layout.add_elements(button)
+    button.tag = "new"
+    assert tagged(layout, "old") == []
+    assert tagged(layout, "new") == [button]
+
+
+def test_nested_layouts_index_grandchildren():
+    root, row = VLayout(), HLayout(tag="row")
+    grandchild = Button(text="ok", tag="old")
+    row.add_elements(grandchild)
+    root.add_elements(row)
+    assert tagged(root, "old") == [grandchild]
+    assert tagged(root, "row") == [row]
+    grandchild.tag = "new"
+    assert tagged(root, "old") == [] and tagged(row, "old") == []
+    assert tagged(root, "new") == [grandchild] and tagged(row, "new") == [grandchild]
+    root.remove_elements(row)
+    assert tagged(root, "new") == [] and tagged(root, "row") == []
+    assert tagged(row, "new") == [grandchild]
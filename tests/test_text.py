@@ -0,0 +1,54 @@
+from shellui.common.text import char_width, text_width, text_cells, measure_text
+from shellui.core.frame import Frame
+from shellui.ui import HLayout
+
+
+def test_ascii_width():
+    assert text_width("hello world") == 11
+    assert text_cells("ab") == ("a", "b")
+
+
+def test_cjk_width():
+    assert char_width("漢") == 2
+    assert text_width("漢字") == 4
+    assert text_width("a漢b") == 4
+    assert text_cells("a漢") == ("a", "漢", "")
+
+
+def test_combining_marks_width():
+    assert char_width("\u0301") == 0
+    assert text_width("e\u0301") == 1
+    assert text_cells("e\u0301x") == ("e\u0301", "x")
+
+
+def test_emoji_width():
+    assert text_width("😀") == 2
+    assert text_width("ok😀") == 4
+
+
+def test_control_characters_width():
+    assert text_width("\t") == 0
+    assert text_width("a\tb") == 2
+    assert text_width("\x1b[1m") == 3
+    assert text_width("\x7f") == 0
+    assert text_cells("a\x07b") == ("a\x07", "b")
+
+
+def test_multiline_metrics():
+    metrics = measure_text("漢字\nabc")
+    assert (metrics.width, metrics.height) == (4, 2)
+    assert metrics.line_widths == [4, 3]
+
+
+def test_frame_put_joins_control_characters():
+    frame = Frame(5, 1)
+    assert frame.put(0, 0, "a\tb") == 2
+    assert frame.chars[:3] == ["a\t", "b", " "]
+
+
+def test_horizontal_spacing_counts_cells():
+    layout = HLayout()
+    layout.cursor.style = "→→ %(widget)s"
+    assert layout.get_spacing() == 3
+    layout.cursor.style = "漢 %(widget)s"
+    assert layout.get_spacing() == 3